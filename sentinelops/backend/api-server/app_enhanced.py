@@ -7,6 +7,12 @@ from datetime import datetime, timedelta
 from fastapi import FastAPI, HTTPException, Query, Depends, status, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+try:
+    # orjson encodes responses several times faster than the stdlib json module
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
 from fastapi.security import APIKeyHeader
 from pydantic import BaseModel, Field, validator
 import psycopg2
@@ -47,7 +53,8 @@ MINIO_BUCKET = os.environ.get("MINIO_BUCKET", "llm-requests")
 app = FastAPI(
     title="SentinelOps API",
     description="API for monitoring and observability of LLM applications",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=DefaultResponse
 )
 
 # Add CORS middleware
@@ -4,9 +4,10 @@ from fastapi import APIRouter, HTTPException, Depends, status, Body, Query
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from datetime import datetime
+from itertools import islice
 
 from ..models.alerts import AlertConfig, AlertEvent, AlertSeverity, AlertType
-from ..services.alerts import AlertService
+from ..services.alerts import AlertService, parse_event_cursor
 from ..middleware.auth import require_permissions, get_current_user
 
 # Create a unified router with standardized prefix
@@ -39,6 +40,11 @@ class AlertHistoryItem(BaseModel):
 # Initialize alert service
 alert_service = AlertService()
 
+@router.on_event("shutdown")
+def flush_alerts():
+    """Send Slack alerts still waiting for their batch window before exiting."""
+    alert_service.flush()
+
 # Routes from the original alerts.py in routes directory
 @router.post("/", response_model=AlertResponse)
 async def send_alert(
@@ -84,24 +90,18 @@ async def get_alert_history(
     """
     Get alert history.
     """
-    # Get history
-    history = alert_service.alert_history
+    # History is appended as alerts are sent, so walking it backwards gives
+    # newest first and the walk can stop once limit alerts are found. Walk a
+    # copy: send_alert may append from another thread, and a deque raises if
+    # it changes while being iterated.
+    history = reversed(list(alert_service.alert_history))
     
     # Apply filters
     if severity:
-        history = [alert for alert in history if alert["severity"] == severity]
-    
-    # Sort by timestamp (newest first)
-    history = sorted(
-        history,
-        key=lambda x: datetime.fromisoformat(x["timestamp"]),
-        reverse=True
-    )
+        history = (alert for alert in history if alert["severity"] == severity)
     
     # Apply limit
-    history = history[:limit]
-    
-    return history
+    return list(islice(history, limit))
 
 @router.post("/test", response_model=AlertResponse)
 async def test_alert(
@@ -274,78 +274,42 @@ async def delete_alert_config(alert_id: str):
 async def get_alert_events(
    config_id: Optional[str] = None,
    limit: int = 100,
-   offset: int = 0,
+   cursor: Optional[str] = None,
    resolved: Optional[bool] = None
 ):
-   """Get alert events, optionally filtered by config ID and resolution status."""
-   db = alert_service.db_connection
-   cursor = db.cursor()
-   
-   # Build query
-   query = "SELECT id, alert_config_id, timestamp, resolved_at, metric_value, threshold_value, details FROM alert_events"
-   where_clauses = []
-   params = []
-   
-   if config_id:
-       where_clauses.append("alert_config_id = %s")
-       params.append(config_id)
-   
-   if resolved is not None:
-       if resolved:
-           where_clauses.append("resolved_at IS NOT NULL")
-       else:
-           where_clauses.append("resolved_at IS NULL")
-   
-   if where_clauses:
-       query += " WHERE " + " AND ".join(where_clauses)
-   
-   query += " ORDER BY timestamp DESC LIMIT %s OFFSET %s"
-   params.extend([limit, offset])
+   """
+   Get alert events newest first, optionally filtered by config ID and resolution status.
+   Pass the "<timestamp>_<id>" of the last event on a page as cursor to fetch the next one.
+   """
+   # Reject a malformed cursor here rather than as a server error
+   if cursor:
+       try:
+           parse_event_cursor(cursor)
+       except ValueError:
+           raise HTTPException(
+               status_code=status.HTTP_400_BAD_REQUEST,
+               detail="Invalid cursor"
+           )
    
-   cursor.execute(query, params)
-   results = cursor.fetchall()
-   
-   events = []
-   for result in results:
-       events.append(AlertEvent(
-           id=result[0],
-           alert_config_id=result[1],
-           timestamp=result[2],
-           resolved_at=result[3],
-           metric_value=result[4],
-           threshold_value=result[5],
-           details=result[6]
-       ))
-   
-   return events
+   return alert_service.get_alert_events(
+       config_id=config_id,
+       limit=limit,
+       cursor=cursor,
+       resolved=resolved
+   )
 
 @router.get("/events/{event_id}", response_model=AlertEvent)
 async def get_alert_event(event_id: str):
    """Get alert event by ID."""
-   db = alert_service.db_connection
-   cursor = db.cursor()
+   event = alert_service.get_alert_event(event_id)
    
-   cursor.execute(
-       "SELECT id, alert_config_id, timestamp, resolved_at, metric_value, threshold_value, details FROM alert_events WHERE id = %s",
-       (event_id,)
-   )
-   result = cursor.fetchone()
-   
-   if not result:
+   if not event:
        raise HTTPException(
            status_code=status.HTTP_404_NOT_FOUND,
            detail=f"Alert event with ID {event_id} not found"
        )
    
-   return AlertEvent(
-       id=result[0],
-       alert_config_id=result[1],
-       timestamp=result[2],
-       resolved_at=result[3],
-       metric_value=result[4],
-       threshold_value=result[5],
-       details=result[6]
-   )
+   return event
 
 @router.post("/events/{event_id}/resolve", dependencies=[Depends(require_permissions(["write:alerts"]))])
 async def resolve_alert_event(event_id: str):
@@ -9,13 +9,48 @@ import requests
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import os
+import threading
+from collections import OrderedDict, deque
 
 from ..models.alerts import AlertConfig, AlertEvent, AlertSeverity, AlertType, AlertThreshold
 
 logger = logging.getLogger(__name__)
 
+# Crockford base32, the ULID alphabet
+_ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_ulid_lock = threading.Lock()
+_ulid_last = 0
+
+def new_event_id() -> str:
+    """
+    Return a ULID: a 48-bit millisecond timestamp followed by 80 random bits.
+    IDs sort in creation order, so inserts append to the id index instead of
+    landing on random pages. IDs made in the same millisecond increment.
+    """
+    global _ulid_last
+    
+    with _ulid_lock:
+        value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+        if value >> 80 == _ulid_last >> 80:
+            value = _ulid_last + 1
+        _ulid_last = value
+    
+    return "".join(_ULID_ALPHABET[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+def parse_event_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Split an alert event cursor of the form "<timestamp>_<id>".
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    timestamp, sep, event_id = cursor.partition("_")
+    if not sep or not event_id:
+        raise ValueError(f"Invalid event cursor: {cursor!r}")
+    return datetime.fromisoformat(timestamp), event_id
+
 class AlertService:
     """
     Comprehensive service for managing and sending alerts.
@@ -49,9 +84,19 @@ class AlertService:
             "sms": self._send_sms_alert
         }
         
-        # Alert history
-        self.alert_history = []
+        # Alert history; the oldest alerts drop off once max_history is reached
         self.max_history = 1000
+        self.alert_history = deque(maxlen=self.max_history)
+        
+        # Throttle state keyed by (title, severity): monotonic time of the last
+        # alert sent, oldest first, and how many alerts were suppressed since then
+        self._throttle_last_sent: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._throttle_suppressed: Dict[Tuple[str, str], int] = {}
+        
+        # Slack attachments waiting for the batch window to close
+        self._slack_pending: List[Dict[str, Any]] = []
+        self._slack_lock = threading.Lock()
+        self._slack_timer: Optional[threading.Timer] = None
         
         logger.info("Alert service initialized")
     
@@ -71,7 +116,8 @@ class AlertService:
             "slack": {
                 "enabled": os.environ.get("ALERT_SLACK_ENABLED", "false").lower() == "true",
                 "webhook_url": os.environ.get("ALERT_SLACK_WEBHOOK_URL", ""),
-                "channel": os.environ.get("ALERT_SLACK_CHANNEL", "#alerts")
+                "channel": os.environ.get("ALERT_SLACK_CHANNEL", "#alerts"),
+                "batch_window_seconds": float(os.environ.get("ALERT_SLACK_BATCH_WINDOW_SECONDS", "0"))
             },
             "webhook": {
                 "enabled": os.environ.get("ALERT_WEBHOOK_ENABLED", "false").lower() == "true",
@@ -286,16 +332,16 @@ class AlertService:
         self,
         config_id: Optional[str] = None,
         limit: int = 100,
-        offset: int = 0,
+        cursor: Optional[str] = None,
         resolved: Optional[bool] = None
     ) -> List[AlertEvent]:
         """
-        Get alert events.
+        Get alert events, newest first.
         
         Args:
             config_id: Filter by alert configuration ID
             limit: Maximum number of events to return
-            offset: Offset for pagination
+            cursor: "<timestamp>_<id>" of the last event on the previous page
             resolved: Filter by resolution status
             
         Returns:
@@ -304,7 +350,7 @@ class AlertService:
         if not self.db_connection:
             return []
             
-        cursor = self.db_connection.cursor()
+        db_cursor = self.db_connection.cursor()
         
         # Build query
         query = "SELECT id, config_id, timestamp, resolved_at, metric_value, threshold_value, details FROM alert_events WHERE 1=1"
@@ -319,14 +365,20 @@ class AlertService:
                 query += " AND resolved_at IS NOT NULL"
             else:
                 query += " AND resolved_at IS NULL"
+        
+        # Keyset pagination: resume after the cursor with an index range scan
+        # instead of reading and discarding every earlier row
+        if cursor:
+            query += " AND (timestamp, id) < (%s, %s)"
+            params.extend(parse_event_cursor(cursor))
                 
-        query += " ORDER BY timestamp DESC LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
+        query += " ORDER BY timestamp DESC, id DESC LIMIT %s"
+        params.append(limit)
         
-        cursor.execute(query, params)
+        db_cursor.execute(query, params)
         
         events = []
-        for row in cursor.fetchall():
+        for row in db_cursor.fetchall():
             event = AlertEvent(
                 id=row[0],
                 alert_config_id=row[1],
@@ -433,8 +485,8 @@ class AlertService:
         if not self.db_connection:
             raise ValueError("Database connection not available")
             
-        # Generate ID
-        event_id = str(uuid.uuid4())
+        # Generate a time-ordered ID
+        event_id = new_event_id()
         
         # Insert into database
         cursor = self.db_connection.cursor()
@@ -507,7 +559,8 @@ class AlertService:
             channels: Specific channels to use (defaults to all enabled)
             
         Returns:
-            True if alert was sent successfully to at least one channel
+            True if alert was sent successfully to at least one channel. Slack
+            alerts held for a batch window count as sent once queued.
         """
         # Check if severity meets minimum threshold
         severity_levels = {
@@ -536,10 +589,13 @@ class AlertService:
             "metadata": metadata or {}
         }
         
+        # Report alerts throttled since the last one with this title and severity
+        suppressed = self._throttle_suppressed.pop((title, severity), 0)
+        if suppressed:
+            alert_data["metadata"] = {**alert_data["metadata"], "suppressed_count": suppressed}
+        
         # Add to history
         self.alert_history.append(alert_data)
-        if len(self.alert_history) > self.max_history:
-            self.alert_history = self.alert_history[-self.max_history:]
         
         # Determine which channels to use
         if not channels:
@@ -583,24 +639,27 @@ class AlertService:
             
         # Check if a similar alert was sent recently
         throttle_period = self.config["general"]["throttle_period_seconds"]
-        now = datetime.now()
+        key = (title, severity)
+        now = time.monotonic()
         
-        for alert in reversed(self.alert_history):
-            # Skip if different title
-            if alert["title"] != title:
-                continue
-                
-            # Skip if different severity
-            if alert["severity"] != severity:
-                continue
-                
-            # Check timestamp
-            alert_time = datetime.fromisoformat(alert["timestamp"])
-            seconds_diff = (now - alert_time).total_seconds()
-            
-            if seconds_diff < throttle_period:
-                return True
-                
+        last_sent = self._throttle_last_sent.get(key)
+        if last_sent is not None and now - last_sent < throttle_period:
+            self._throttle_suppressed[key] = self._throttle_suppressed.get(key, 0) + 1
+            return True
+        
+        # Forget keys whose window has passed, oldest first, so both tables
+        # only hold alerts sent within the last throttle period
+        self._throttle_last_sent.pop(key, None)
+        while self._throttle_last_sent:
+            oldest, sent = next(iter(self._throttle_last_sent.items()))
+            if now - sent < throttle_period:
+                break
+            self._throttle_last_sent.popitem(last=False)
+            suppressed = self._throttle_suppressed.pop(oldest, 0)
+            if suppressed:
+                logger.info(f"{suppressed} '{oldest[0]}' alert(s) throttled with no later alert to report them")
+        
+        self._throttle_last_sent[key] = now
         return False
     
     def _send_email_alert(self, alert_data: Dict[str, Any]) -> bool:
@@ -657,57 +716,107 @@ class AlertService:
             return False
     
     def _send_slack_alert(self, alert_data: Dict[str, Any]) -> bool:
-        """Send an alert via Slack webhook."""
+        """
+        Send an alert via Slack webhook.
+        With a batch window configured, the alert is queued and sent with any
+        others raised in the same window as one message. Batched sends are
+        fire-and-forget: True only means the alert was queued, delivery
+        failures are logged when the batch is posted, and alerts still queued
+        at shutdown are lost unless flush() is called first.
+        """
         config = self.config["slack"]
         if not config["enabled"] or not config["webhook_url"]:
             return False
             
+        attachment = self._slack_attachment(alert_data)
+        
+        batch_window = config.get("batch_window_seconds", 0)
+        if batch_window <= 0:
+            return self._post_slack_attachments([attachment])
+        
+        with self._slack_lock:
+            self._slack_pending.append(attachment)
+            if self._slack_timer is None:
+                self._slack_timer = threading.Timer(batch_window, self.flush)
+                self._slack_timer.daemon = True
+                self._slack_timer.start()
+        
+        return True
+    
+    def flush(self) -> bool:
+        """
+        Send any Slack alerts waiting for their batch window to close.
+        
+        Returns:
+            True if every pending alert was sent (or none were pending)
+        """
+        with self._slack_lock:
+            attachments, self._slack_pending = self._slack_pending, []
+            if self._slack_timer is not None:
+                self._slack_timer.cancel()
+                self._slack_timer = None
+        
+        # Slack accepts at most 100 attachments per message
+        success = True
+        for i in range(0, len(attachments), 100):
+            success = self._post_slack_attachments(attachments[i:i + 100]) and success
+        return success
+    
+    def _slack_attachment(self, alert_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the Slack message attachment for an alert."""
+        # Set color based on severity
+        color_map = {
+            "info": "#2196F3",      # Blue
+            "warning": "#FF9800",   # Orange
+            "error": "#F44336",     # Red
+            "critical": "#9C27B0"   # Purple
+        }
+        color = color_map.get(alert_data["severity"], "#757575")
+        
+        attachment = {
+            "fallback": f"{alert_data['severity'].upper()}: {alert_data['title']}",
+            "color": color,
+            "title": alert_data["title"],
+            "text": alert_data["message"],
+            "fields": [
+                {
+                    "title": "Severity",
+                    "value": alert_data["severity"].upper(),
+                    "short": True
+                },
+                {
+                    "title": "Time",
+                    "value": alert_data["timestamp"],
+                    "short": True
+                }
+            ],
+            "footer": "SentinelOps Monitoring"
+        }
+        
+        # Add metadata fields
+        for key, value in alert_data["metadata"].items():
+            attachment["fields"].append({
+                "title": key.replace("_", " ").title(),
+                "value": str(value),
+                "short": True
+            })
+        
+        return attachment
+    
+    def _post_slack_attachments(self, attachments: List[Dict[str, Any]]) -> bool:
+        """Post alert attachments to the Slack webhook as one message."""
+        config = self.config["slack"]
+        titles = ", ".join(attachment["title"] for attachment in attachments)
+        
         try:
-            # Set color based on severity
-            color_map = {
-                "info": "#2196F3",      # Blue
-                "warning": "#FF9800",   # Orange
-                "error": "#F44336",     # Red
-                "critical": "#9C27B0"   # Purple
-            }
-            color = color_map.get(alert_data["severity"], "#757575")
-            
             # Create payload
             payload = {
                 "channel": config["channel"],
                 "username": "SentinelOps Alert",
                 "icon_emoji": ":bell:",
-                "attachments": [
-                    {
-                        "fallback": f"{alert_data['severity'].upper()}: {alert_data['title']}",
-                        "color": color,
-                        "title": alert_data["title"],
-                        "text": alert_data["message"],
-                        "fields": [
-                            {
-                                "title": "Severity",
-                                "value": alert_data["severity"].upper(),
-                                "short": True
-                            },
-                            {
-                                "title": "Time",
-                                "value": alert_data["timestamp"],
-                                "short": True
-                            }
-                        ],
-                        "footer": "SentinelOps Monitoring"
-                    }
-                ]
+                "attachments": attachments
             }
             
-            # Add metadata fields
-            for key, value in alert_data["metadata"].items():
-                payload["attachments"][0]["fields"].append({
-                    "title": key.replace("_", " ").title(),
-                    "value": str(value),
-                    "short": True
-                })
-            
             # Send request
             response = requests.post(
                 config["webhook_url"],
@@ -716,7 +825,7 @@ class AlertService:
             )
             
             if response.status_code == 200:
-                logger.info(f"Slack alert sent: {alert_data['title']}")
+                logger.info(f"Slack alert sent: {titles}")
                 return True
             else:
                 logger.error(f"Failed to send Slack alert: {response.status_code} - {response.text}")
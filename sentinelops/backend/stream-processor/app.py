@@ -9,7 +9,6 @@ import os.path
 import json as json_lib
 from kafka import KafkaConsumer
 import minio
-import uuid
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -76,6 +75,8 @@ class StreamProcessor:
         self.conn = sqlite3.connect(SQLITE_DB_PATH)
         self.conn.row_factory = sqlite3.Row
         self.cursor = self.conn.cursor()
+        # Fetch result rows in large blocks rather than one at a time
+        self.cursor.arraysize = 1000
         
         # Create tables if they don't exist
         self.cursor.execute('''
@@ -290,31 +291,31 @@ class StreamProcessor:
     
     def report_anomalies(self, metrics: Dict[str, Any], anomalies: List[Dict[str, Any]]):
         """Report detected anomalies to the database."""
-        for anomaly in anomalies:
-            anomaly_id = str(uuid.uuid4())
-            
-            # Convert anomaly to JSON string for storage
-            anomaly_json = json_lib.dumps(anomaly)
-            
-            # Store anomaly in database
-            self.cursor.execute(
-                """
-                INSERT INTO anomalies 
-                (request_id, anomaly_type, provider, model, application, description, severity)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    metrics["request_id"],
-                    anomaly["type"],
-                    metrics["provider"],
-                    metrics["model"],
-                    metrics["application"],
-                    anomaly_json,
-                    "high" if anomaly["type"] == "error_rate_spike" else "medium"
-                )
+        # Store all anomalies for the event in one batch and one commit
+        rows = [
+            (
+                metrics["request_id"],
+                anomaly["type"],
+                metrics["provider"],
+                metrics["model"],
+                metrics["application"],
+                json_lib.dumps(anomaly),
+                "high" if anomaly["type"] == "error_rate_spike" else "medium"
             )
-            self.conn.commit()
-            
+            for anomaly in anomalies
+        ]
+        
+        self.cursor.executemany(
+            """
+            INSERT INTO anomalies 
+            (request_id, anomaly_type, provider, model, application, description, severity)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows
+        )
+        self.conn.commit()
+        
+        for anomaly in anomalies:
             logger.warning(f"Anomaly detected: {anomaly['type']} for request {metrics['request_id']}")
     
     def run(self):
@@ -722,15 +722,16 @@ class HallucinationDetector:
         
         # Having both definitive and uncertain language is a potential red flag
         if definitive_count > 0 and uncertainty_count > 0:
-            # Calculate ratio
-            smaller_count = min(definitive_count, uncertainty_count)
-            larger_count = max(definitive_count, uncertainty_count)
-            
-            if larger_count > 0:
-                language_inconsistency_ratio = smaller_count / larger_count
-                
-                # Higher score for more balanced mixture (closer to 1.0 ratio)
-                pattern_score += 0.3 * language_inconsistency_ratio
+            # Calculate ratio (single compare instead of separate min/max calls)
+            if definitive_count < uncertainty_count:
+                smaller_count, larger_count = definitive_count, uncertainty_count
+            else:
+                smaller_count, larger_count = uncertainty_count, definitive_count
+
+            language_inconsistency_ratio = smaller_count / larger_count
+
+            # Higher score for more balanced mixture (closer to 1.0 ratio)
+            pattern_score += 0.3 * language_inconsistency_ratio
         
         # Check for unnaturally balanced structure (e.g., listing pros and cons with exactly the same number)
         # This can be a sign of fabrication
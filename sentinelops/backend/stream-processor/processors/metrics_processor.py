@@ -7,6 +7,32 @@ from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
+# Numeric fields of a monitoring event that process_events records as metrics
+EVENT_METRIC_TYPES = (
+    "inference_time",
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "estimated_cost",
+)
+
+def _describe(values: List[float]) -> Dict[str, Any]:
+    """Summary statistics for a non-empty list of values."""
+    # Convert once; each np.* reduction on a list would convert it again
+    values = np.asarray(values, dtype=float)
+    count = len(values)
+    total = values.sum()
+    
+    return {
+        "mean": float(total / count),
+        "median": float(np.median(values)),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "std": float(values.std()) if count > 1 else 0.0,
+        "count": count,
+        "sum": float(total)
+    }
+
 class MetricsProcessor:
     """
     Process and aggregate LLM monitoring metrics.
@@ -37,6 +63,12 @@ class MetricsProcessor:
         # Track last aggregation time
         self.last_hourly_aggregation = datetime.now()
         self.last_daily_aggregation = datetime.now()
+        
+        # Ranked get_top_consumers results for the current minute, keyed by
+        # (metric_type, time_window); repeated dashboard refreshes reuse them
+        # until add_metric or process_events records new data
+        self._top_consumers_cache = {}
+        self._top_consumers_minute = None
     
     def add_metric(
         self, 
@@ -58,7 +90,7 @@ class MetricsProcessor:
         provider = metadata.get("provider", "unknown")
         model = metadata.get("model", "unknown")
         application = metadata.get("application", "unknown")
-        key = f"{provider}:{model}:{application}"
+        key = (provider, model, application)
         
         # Create a data point with all information
         data_point = {
@@ -76,6 +108,96 @@ class MetricsProcessor:
         
         # Check if we need to update aggregations
         self._check_aggregation_schedule()
+        
+        # New data invalidates the cached top consumer rankings
+        self._top_consumers_cache.clear()
+    
+    def process_events(self, events: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+        """
+        Record a batch of monitoring events.
+        
+        Each numeric field in EVENT_METRIC_TYPES becomes a data point, as if
+        add_metric had been called for it, but the batch is grouped by
+        provider/model/application once, each key's history is trimmed once,
+        and the aggregation schedule is checked once.
+        
+        Args:
+            events: Monitoring events as published by the SDK
+            
+        Returns:
+            Per-key batch totals: "count" plus "<metric>_sum" for each metric type
+        """
+        if not events:
+            return {}
+        
+        # Factorize the composite keys in first-seen order
+        key_codes = {}
+        codes = np.array([
+            key_codes.setdefault(
+                (
+                    event.get("provider", "unknown"),
+                    event.get("model", "unknown"),
+                    event.get("application", "unknown"),
+                ),
+                len(key_codes),
+            )
+            for event in events
+        ])
+        unique_keys = list(key_codes)
+        
+        # Struct-of-arrays view of the batch; a missing field is NaN
+        columns = {
+            metric_type: np.array(
+                [event.get(metric_type) for event in events], dtype=float
+            )
+            for metric_type in EVENT_METRIC_TYPES
+        }
+        
+        # Per-key totals in one pass per column
+        counts = np.bincount(codes, minlength=len(unique_keys))
+        summary = {key: {"count": int(count)} for key, count in zip(unique_keys, counts)}
+        for metric_type, values in columns.items():
+            sums = np.bincount(codes, weights=np.nan_to_num(values), minlength=len(unique_keys))
+            for key, total in zip(unique_keys, sums):
+                summary[key][f"{metric_type}_sum"] = float(total)
+        
+        # Event metadata is shared by the data points of all its metric types
+        metadata = []
+        for event in events:
+            timestamp = event.get("timestamp")
+            if timestamp is None:
+                timestamp = datetime.now()
+            elif isinstance(timestamp, (int, float)):
+                timestamp = datetime.fromtimestamp(timestamp)
+            elif isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp)
+            fields = {k: v for k, v in event.items() if k not in EVENT_METRIC_TYPES}
+            fields["timestamp"] = timestamp
+            metadata.append(fields)
+        
+        # Group event indices by key, keeping batch order within each key
+        order = np.argsort(codes, kind="stable")
+        groups = np.split(order, np.cumsum(counts)[:-1])
+        
+        for key, indices in zip(unique_keys, groups):
+            for metric_type, values in columns.items():
+                present = indices[~np.isnan(values[indices])]
+                if not len(present):
+                    continue
+                
+                history = self.metrics[metric_type][key]
+                history.extend(
+                    {"value": float(values[i]), **metadata[i]} for i in present
+                )
+                if len(history) > self.max_history:
+                    self.metrics[metric_type][key] = history[-self.max_history:]
+        
+        self._check_aggregation_schedule()
+        
+        # New data invalidates the cached top consumer rankings
+        self._top_consumers_cache.clear()
+        
+        return summary
     
     def _check_aggregation_schedule(self) -> None:
         """Check if it's time to update aggregations."""
@@ -122,15 +244,7 @@ class MetricsProcessor:
                     if not values:
                         continue
                         
-                    stats = {
-                        "mean": float(np.mean(values)),
-                        "median": float(np.median(values)),
-                        "min": float(np.min(values)),
-                        "max": float(np.max(values)),
-                        "std": float(np.std(values)) if len(values) > 1 else 0.0,
-                        "count": len(values),
-                        "sum": float(np.sum(values))
-                    }
+                    stats = _describe(values)
                     
                     # Store in hourly metrics
                     self.hourly_metrics[metric_type][key][hour] = stats
@@ -166,15 +280,7 @@ class MetricsProcessor:
                     if not values:
                         continue
                         
-                    stats = {
-                        "mean": float(np.mean(values)),
-                        "median": float(np.median(values)),
-                        "min": float(np.min(values)),
-                        "max": float(np.max(values)),
-                        "std": float(np.std(values)) if len(values) > 1 else 0.0,
-                        "count": len(values),
-                        "sum": float(np.sum(values))
-                    }
+                    stats = _describe(values)
                     
                     # Store in daily metrics
                     self.daily_metrics[metric_type][key][day] = stats
@@ -204,7 +310,7 @@ class MetricsProcessor:
         Returns:
             List of time series data points
         """
-        key = f"{provider}:{model}:{application}"
+        key = (provider, model, application)
         
         # Set default time range if not provided
         if end_time is None:
@@ -262,7 +368,7 @@ class MetricsProcessor:
         Returns:
             Summary statistics
         """
-        key = f"{provider}:{model}:{application}"
+        key = (provider, model, application)
         
         # Parse time window
         amount = int(time_window[:-1])
@@ -301,13 +407,68 @@ class MetricsProcessor:
             }
             
         return {
-            "mean": float(np.mean(values_in_range)),
-            "median": float(np.median(values_in_range)),
-            "min": float(np.min(values_in_range)),
-            "max": float(np.max(values_in_range)),
-            "std": float(np.std(values_in_range)) if len(values_in_range) > 1 else 0.0,
-            "count": len(values_in_range),
-            "sum": float(np.sum(values_in_range)),
+            **_describe(values_in_range),
+            "available": True
+        }
+    
+    def get_latency_statistics(
+        self, 
+        provider: str, 
+        model: str, 
+        application: str,
+        time_window: str = "1d"
+    ) -> Dict[str, Any]:
+        """
+        Get inference time statistics over a time window.
+        
+        Args:
+            provider: LLM provider
+            model: Model name
+            application: Application name
+            time_window: Time window for the statistics (e.g., "1h", "1d", "7d", "30d")
+            
+        Returns:
+            Minimum, maximum, mean and standard deviation of inference time
+        """
+        key = (provider, model, application)
+        
+        # Parse time window
+        amount = int(time_window[:-1])
+        unit = time_window[-1]
+        
+        if unit == "h":
+            delta = timedelta(hours=amount)
+        elif unit == "d":
+            delta = timedelta(days=amount)
+        else:
+            raise ValueError(f"Invalid time window: {time_window}")
+        
+        # Calculate time range
+        end_time = datetime.now()
+        start_time = end_time - delta
+        
+        # Collect the values straight into a float array
+        data_points = self.metrics["inference_time"].get(key, [])
+        latencies = np.fromiter(
+            (
+                point["value"] for point in data_points
+                if "timestamp" in point and start_time <= point["timestamp"] <= end_time
+            ),
+            dtype=np.float64
+        )
+        
+        if not latencies.size:
+            return {
+                "count": 0,
+                "available": False
+            }
+        
+        return {
+            "min_latency": float(latencies.min()),
+            "max_latency": float(latencies.max()),
+            "avg_latency": float(latencies.mean()),
+            "std_latency": float(latencies.std()) if latencies.size > 1 else 0.0,
+            "count": int(latencies.size),
             "available": True
         }
     
@@ -326,8 +487,19 @@ class MetricsProcessor:
             time_window: Time window for analysis (e.g., "1h", "1d", "7d", "30d")
             
         Returns:
-            List of top consumers with their statistics
+            List of top consumers with their statistics. Rankings are cached
+            for the rest of the current minute, until new data is added.
         """
+        # Reuse this minute's ranking for the same metric and window
+        minute = datetime.now().replace(second=0, microsecond=0)
+        if minute != self._top_consumers_minute:
+            self._top_consumers_cache.clear()
+            self._top_consumers_minute = minute
+        
+        cache_key = (metric_type, time_window)
+        if cache_key in self._top_consumers_cache:
+            return [dict(result) for result in self._top_consumers_cache[cache_key][:limit]]
+        
         # Parse time window
         amount = int(time_window[:-1])
         unit = time_window[-1]
@@ -348,8 +520,7 @@ class MetricsProcessor:
         
         if metric_type in self.metrics:
             for key, data_points in self.metrics[metric_type].items():
-                # Split the key
-                provider, model, application = key.split(":", 2)
+                provider, model, application = key
                 
                 # Calculate sum in time range
                 values_in_range = []
@@ -358,15 +529,17 @@ class MetricsProcessor:
                         values_in_range.append(point["value"])
                 
                 if values_in_range:
+                    total = float(np.sum(values_in_range))
                     results.append({
                         "provider": provider,
                         "model": model,
                         "application": application,
-                        "sum": float(np.sum(values_in_range)),
+                        "sum": total,
                         "count": len(values_in_range),
-                        "mean": float(np.mean(values_in_range))
+                        "mean": total / len(values_in_range)
                     })
         
         # Sort by sum (descending) and take top N
         results.sort(key=lambda x: x["sum"], reverse=True)
-        return results[:limit]
\ No newline at end of file
+        self._top_consumers_cache[cache_key] = results
+        return [dict(result) for result in results[:limit]]
\ No newline at end of file
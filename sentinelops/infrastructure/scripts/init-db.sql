@@ -117,6 +117,29 @@ CREATE TABLE IF NOT EXISTS alerts (
 CREATE INDEX IF NOT EXISTS alerts_timestamp_idx ON alerts(timestamp);
 CREATE INDEX IF NOT EXISTS alerts_type_idx ON alerts(type);
 
+-- Alert Configs Table: Alert rules managed through the alerts API
+CREATE TABLE IF NOT EXISTS alert_configs (
+    id VARCHAR(255) PRIMARY KEY,
+    config TEXT NOT NULL,
+    enabled BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+-- Alert Events Table: Alerts raised by alert configs
+CREATE TABLE IF NOT EXISTS alert_events (
+    id VARCHAR(255) PRIMARY KEY,
+    config_id VARCHAR(255) REFERENCES alert_configs(id),
+    timestamp TIMESTAMP NOT NULL,
+    resolved_at TIMESTAMP,
+    metric_value FLOAT,
+    threshold_value FLOAT,
+    details TEXT
+);
+
+-- Create indexes for newest-first event listings, with and without a
+-- config filter; id breaks timestamp ties
+CREATE INDEX IF NOT EXISTS alert_events_config_ts_idx ON alert_events(config_id, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS alert_events_ts_idx ON alert_events(timestamp DESC, id DESC);
+
 -- Functions and Procedures
 
 -- Function to aggregate daily metrics (to be run by a scheduler)
@@ -41,6 +41,7 @@ class BatchProcessor:
         self.last_flush = time.time()
         self.flush_lock = threading.Lock()
         self.stopping = threading.Event()
+        self.flush_requested = threading.Event()
         
         # Start auto-flush thread if enabled
         if auto_flush:
@@ -57,9 +58,13 @@ class BatchProcessor:
         try:
             self.queue.put_nowait(item)
             
-            # Flush if batch size reached
+            # Flush if batch size reached; hand off to the background thread
+            # when there is one so callers never wait on process_func
             if self.queue.qsize() >= self.batch_size:
-                self.flush()
+                if self.flush_thread:
+                    self.flush_requested.set()
+                else:
+                    self.flush()
                 
             return True
         except queue.Full:
@@ -98,18 +103,21 @@ class BatchProcessor:
     def _auto_flush_loop(self):
         """Background thread that periodically flushes the queue."""
         while not self.stopping.is_set():
+            # Wake early when add() reports a full batch
+            requested = self.flush_requested.wait(timeout=min(1.0, self.flush_interval / 5))
+            if requested:
+                self.flush_requested.clear()
+            
             time_since_flush = time.time() - self.last_flush
             
-            if time_since_flush >= self.flush_interval:
+            if requested or time_since_flush >= self.flush_interval:
                 self.flush()
-            
-            # Sleep for a short time to avoid CPU spinning
-            time.sleep(min(1.0, self.flush_interval / 5))
     
     def stop(self):
         """Stop the batch processor and flush remaining items."""
         if self.flush_thread and self.flush_thread.is_alive():
             self.stopping.set()
+            self.flush_requested.set()
             self.flush_thread.join(timeout=self.flush_interval)
         
         # Final flush
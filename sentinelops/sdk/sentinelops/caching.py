@@ -10,6 +10,15 @@ from threading import Lock
 
 logger = logging.getLogger(__name__)
 
+try:
+    import xxhash
+    
+    def _hash_key(key_data: bytes) -> str:
+        return xxhash.xxh3_128_hexdigest(key_data)
+except ImportError:
+    def _hash_key(key_data: bytes) -> str:
+        return hashlib.md5(key_data).hexdigest()
+
 class ResponseCache:
     """
     Simple cache for LLM responses to avoid duplicate API calls.
@@ -51,11 +60,10 @@ class ResponseCache:
     def _generate_key(self, provider: str, model: str, prompt: str, params: Dict[str, Any]) -> str:
         """Generate a unique cache key based on request parameters."""
         # Sort params for consistent key generation
-        sorted_params = {k: params[k] for k in sorted(params.keys())}
+        key_data = f"{provider}:{model}:{prompt}:{json.dumps(params, sort_keys=True)}"
         
-        # Create string representation and hash it
-        key_data = f"{provider}:{model}:{prompt}:{json.dumps(sorted_params)}"
-        return hashlib.md5(key_data.encode('utf-8')).hexdigest()
+        # Hash with xxh3 when available; it is much faster than md5 on long prompts
+        return _hash_key(key_data.encode('utf-8'))
     
     def get(
         self, 
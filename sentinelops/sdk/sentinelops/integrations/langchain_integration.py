@@ -1,15 +1,14 @@
 # sentinelops/sdk/sentinelops/integrations/langchain_integration.py
 import time
-import uuid
 import logging
-from typing import Any, Dict, List, Optional, Union, Callable
+from typing import Any, Dict, List, Optional, Tuple, Union, Callable
 
 from langchain.llms.base import LLM
 from langchain.chat_models.base import BaseChatModel
 from langchain.schema import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain.callbacks.base import BaseCallbackHandler
 
-from ..sdk import LLMMonitor
+from ..sdk import LLMMonitor, new_request_id
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +17,10 @@ class SentinelOpsCallbackHandler(BaseCallbackHandler):
     LangChain callback handler for SentinelOps monitoring.
     """
     
+    # Per-request state lives in slots; BaseCallbackHandler itself is not
+    # slotted, so this speeds attribute access rather than removing __dict__
+    __slots__ = ("monitor", "current_request_id", "start_time", "_start_ns", "current_prompt")
+    
     def __init__(
         self, 
         monitor: LLMMonitor,
@@ -31,15 +34,17 @@ class SentinelOpsCallbackHandler(BaseCallbackHandler):
             self.monitor.environment = environment
         
         self.current_request_id = None
-        self.start_time = None
+        self.start_time = None  # Wall-clock timestamp reported with the event
+        self._start_ns = None  # Monotonic start used to measure inference time
         self.current_prompt = None
         
     def on_llm_start(
         self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any
     ) -> None:
         """Record the start of an LLM call."""
-        self.current_request_id = str(uuid.uuid4())
+        self.current_request_id = new_request_id()
         self.start_time = time.time()
+        self._start_ns = time.perf_counter_ns()
         self.current_prompt = prompts[0] if prompts else ""
         
         # Log the start
@@ -52,8 +57,7 @@ class SentinelOpsCallbackHandler(BaseCallbackHandler):
         if not self.start_time:
             return
         
-        end_time = time.time()
-        inference_time = end_time - self.start_time
+        inference_time = (time.perf_counter_ns() - self._start_ns) / 1e9
         
         # Extract completion text
         completion = ""
@@ -61,9 +65,15 @@ class SentinelOpsCallbackHandler(BaseCallbackHandler):
             if hasattr(response.generations[0][0], "text"):
                 completion = response.generations[0][0].text
         
-        # Record metrics
-        prompt_tokens = self.monitor._count_tokens(self.current_prompt, self.monitor.model)
-        completion_tokens = self.monitor._count_tokens(completion, self.monitor.model)
+        # Record metrics, preferring the token usage reported by the LLM
+        llm_output = getattr(response, "llm_output", None) or {}
+        token_usage = llm_output.get("token_usage") or {}
+        prompt_tokens = token_usage.get("prompt_tokens")
+        completion_tokens = token_usage.get("completion_tokens")
+        if prompt_tokens is None:
+            prompt_tokens = self.monitor._count_tokens(self.current_prompt, self.monitor.model)
+        if completion_tokens is None:
+            completion_tokens = self.monitor._count_tokens(completion, self.monitor.model)
         
         # Prepare monitoring data
         monitoring_data = {
@@ -94,6 +104,7 @@ class SentinelOpsCallbackHandler(BaseCallbackHandler):
         # Reset state
         self.current_request_id = None
         self.start_time = None
+        self._start_ns = None
         self.current_prompt = None
         
     def on_llm_error(
@@ -103,8 +114,7 @@ class SentinelOpsCallbackHandler(BaseCallbackHandler):
         if not self.start_time:
             return
             
-        end_time = time.time()
-        inference_time = end_time - self.start_time
+        inference_time = (time.perf_counter_ns() - self._start_ns) / 1e9
         
         # Record metrics
         prompt_tokens = self.monitor._count_tokens(self.current_prompt, self.monitor.model)
@@ -133,6 +143,7 @@ class SentinelOpsCallbackHandler(BaseCallbackHandler):
         # Reset state
         self.current_request_id = None
         self.start_time = None
+        self._start_ns = None
         self.current_prompt = None
 
 class MonitoredLLM(LLM):
@@ -187,6 +198,25 @@ class MonitoredLLM(LLM):
         # Call with monitoring
         result = self.monitor.call(prompt, client_function, **kwargs)
         return result
+    
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, **kwargs) -> str:
+        """
+        Call the LLM asynchronously with monitoring.
+        Lets LangChain's async batch APIs run many monitored calls concurrently.
+        
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of stop sequences
+            **kwargs: Additional arguments to pass to the LLM
+            
+        Returns:
+            The generated text
+        """
+        async def client_function(prompt_text, **kw):
+            return await self.llm._acall(prompt_text, stop=stop, **kw)
+            
+        # Call with monitoring
+        return await self.monitor.acall(prompt, client_function, **kwargs)
 
 
 class MonitoredChatModel(BaseChatModel):
@@ -237,24 +267,56 @@ class MonitoredChatModel(BaseChatModel):
         Returns:
             The chat completion
         """
-        # Format messages for monitoring
-        formatted_messages = []
-        for msg in messages:
-            if isinstance(msg, HumanMessage):
-                formatted_messages.append({"role": "user", "content": msg.content})
-            elif isinstance(msg, AIMessage):
-                formatted_messages.append({"role": "assistant", "content": msg.content})
-            elif isinstance(msg, SystemMessage):
-                formatted_messages.append({"role": "system", "content": msg.content})
-            else:
-                formatted_messages.append({"role": msg.__class__.__name__, "content": msg.content})
-        
-        # Combine messages into a prompt for monitoring
-        prompt = "\n".join([m["content"] for m in formatted_messages])
+        prompt, prompt_tokens = self._prepare_prompt(messages)
         
         def client_function(prompt_text, **kw):
             # The prompt_text is ignored here, we use messages instead
             return self.chat_model._generate(messages, stop=stop, **kw)
             
         # Call with monitoring
-        return self.monitor.call(prompt, client_function, **kwargs)
\ No newline at end of file
+        return self.monitor.call(prompt, client_function, prompt_tokens=prompt_tokens, **kwargs)
+    
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs
+    ) -> Any:
+        """
+        Generate chat completions asynchronously with monitoring.
+        
+        Args:
+            messages: The messages to send to the chat model
+            stop: Optional list of stop sequences
+            **kwargs: Additional arguments to pass to the chat model
+            
+        Returns:
+            The chat completion
+        """
+        prompt, prompt_tokens = self._prepare_prompt(messages)
+        
+        async def client_function(prompt_text, **kw):
+            # The prompt_text is ignored here, we use messages instead
+            return await self.chat_model._agenerate(messages, stop=stop, **kw)
+            
+        # Call with monitoring
+        return await self.monitor.acall(prompt, client_function, prompt_tokens=prompt_tokens, **kwargs)
+    
+    def _prepare_prompt(self, messages: List[BaseMessage]) -> Tuple[str, int]:
+        """Build the monitoring prompt and its token count from chat messages."""
+        contents = [msg.content for msg in messages]
+        
+        # Count each distinct message once; system prompts and few-shot
+        # examples repeat across turns and would otherwise be re-tokenized
+        occurrences = {}
+        for content in contents:
+            occurrences[content] = occurrences.get(content, 0) + 1
+        prompt_tokens = sum(
+            self.monitor._count_tokens(content, self.monitor.model) * count
+            for content, count in occurrences.items()
+        )
+        
+        # The combined prompt is only needed for logging and cache keys
+        if self.monitor.log_requests or self.monitor.enable_caching:
+            prompt = "\n".join(contents)
+        else:
+            prompt = ""
+        
+        return prompt, prompt_tokens
@@ -1,7 +1,7 @@
 import os
 import time
 import logging
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 import json
 
 from .base import BaseProviderMonitor
@@ -15,6 +15,15 @@ class AzureOpenAIMonitor(BaseProviderMonitor):
     Supports both chat completion and completion endpoints.
     """
     
+    # Map Azure model names to OpenAI model names for tokenization
+    _MODEL_MAPPING = {
+        "gpt-35-turbo": "gpt-3.5-turbo",
+        "gpt-35-turbo-16k": "gpt-3.5-turbo-16k",
+        "gpt-4": "gpt-4",
+        "gpt-4-32k": "gpt-4-32k",
+        "gpt-4-vision": "gpt-4-vision-preview",
+    }
+    
     def __init__(
         self,
         api_key: Optional[str] = None,
@@ -57,9 +66,20 @@ class AzureOpenAIMonitor(BaseProviderMonitor):
         
         self.deployment_name = deployment_name or model.replace(".", "")
         self.api_version = api_version
+        self._openai_model = self._MODEL_MAPPING.get(model, model)
+
         self.client = None
         self.setup_client()
         
+        # Bind the client-version-specific API functions once instead of
+        # building a closure on every call
+        if self.client_version == "v1":
+            self._chat_fn = self._v1_chat
+            self._completion_fn = self._v1_completion
+        else:
+            self._chat_fn = self._legacy_chat
+            self._completion_fn = self._legacy_completion
+        
     def setup_client(self):
         """Set up the Azure OpenAI client."""
         try:
@@ -91,19 +111,29 @@ class AzureOpenAIMonitor(BaseProviderMonitor):
     def extract_completion(self, response: Any) -> str:
         """Extract completion text from Azure OpenAI response."""
         try:
-            if hasattr(response, "choices"):
+            # Try the common shapes directly (EAFP): one attribute walk on the
+            # happy path instead of a hasattr probe before every access
+            try:
+                choice = response.choices[0]
+            except AttributeError:
+                pass
+            else:
                 # Handle both completion and chat completion
-                if hasattr(response.choices[0], "message"):
-                    return response.choices[0].message.content
-                else:
-                    return response.choices[0].text
-            elif isinstance(response, dict):
-                # Handle dictionary response
-                if "choices" in response:
-                    if "message" in response["choices"][0]:
-                        return response["choices"][0]["message"]["content"]
-                    else:
-                        return response["choices"][0]["text"]
+                try:
+                    return choice.message.content
+                except AttributeError:
+                    return choice.text
+            
+            # Handle dictionary response
+            try:
+                choice = response["choices"][0]
+            except (KeyError, TypeError):
+                pass
+            else:
+                try:
+                    return choice["message"]["content"]
+                except KeyError:
+                    return choice["text"]
             
             # If we can't extract, return string representation
             return str(response)
@@ -111,6 +141,14 @@ class AzureOpenAIMonitor(BaseProviderMonitor):
             logger.warning(f"Failed to extract completion: {str(e)}")
             return str(response)
     
+    def extract_usage(self, response: Any) -> Optional[Tuple[int, int]]:
+        """
+        Extract (prompt_tokens, completion_tokens) from the response's usage block.
+        Returns None when usage is not reported, in which case the monitor falls
+        back to counting tokens itself.
+        """
+        return self.monitor._extract_usage(response)
+    
     def chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -128,32 +166,26 @@ class AzureOpenAIMonitor(BaseProviderMonitor):
         Returns:
             The API response
         """
-        # Prepare the prompt for token counting (concatenate all messages)
-        prompt_text = ""
-        for message in messages:
-            role = message.get("role", "user")
-            content = message.get("content", "")
-            prompt_text += f"{role}: {content}\n"
+        # Prepare the prompt for token counting (concatenate all messages in one
+        # pass; repeated += is quadratic for long histories)
+        prompt_text = "".join(
+            f"{message.get('role', 'user')}: {message.get('content', '')}\n"
+            for message in messages
+        )
         
-        # Define the client function to call
-        def client_function(prompt_text, **kw):
+        if stream:
+            # Ask for usage on the final chunk so the stream can be measured
+            # without buffering it (only supported by the v1 client)
             if self.client_version == "v1":
-                return self.client.chat.completions.create(
-                    deployment_name=self.deployment_name,
-                    messages=messages,
-                    stream=stream,
-                    **kwargs
-                )
-            else:
-                return self.client.ChatCompletion.create(
-                    engine=self.deployment_name,
-                    messages=messages,
-                    stream=stream,
-                    **kwargs
-                )
+                kwargs.setdefault("stream_options", {"include_usage": True})
+            return self._monitor_stream(
+                prompt_text, self._chat_fn, messages=messages, stream=True, **kwargs
+            )
         
         # Monitor the call
-        return self._monitor_call(prompt_text, client_function, **kwargs)
+        return self._monitor_call(
+            prompt_text, self._chat_fn, messages=messages, stream=stream, **kwargs
+        )
     
     def completion(
         self,
@@ -172,25 +204,44 @@ class AzureOpenAIMonitor(BaseProviderMonitor):
         Returns:
             The API response
         """
-        # Define the client function to call
-        def client_function(prompt_text, **kw):
-            if self.client_version == "v1":
-                return self.client.completions.create(
-                    deployment_name=self.deployment_name,
-                    prompt=prompt,
-                    stream=stream,
-                    **kwargs
-                )
-            else:
-                return self.client.Completion.create(
-                    engine=self.deployment_name,
-                    prompt=prompt,
-                    stream=stream,
-                    **kwargs
-                )
-        
         # Monitor the call
-        return self._monitor_call(prompt, client_function, **kwargs)
+        return self._monitor_call(prompt, self._completion_fn, stream=stream, **kwargs)
+    
+    def _v1_chat(self, prompt_text: str, messages: List[Dict[str, str]], stream: bool = False, **kwargs) -> Any:
+        """Chat completion through the openai>=1.0 client."""
+        return self.client.chat.completions.create(
+            deployment_name=self.deployment_name,
+            messages=messages,
+            stream=stream,
+            **kwargs
+        )
+    
+    def _legacy_chat(self, prompt_text: str, messages: List[Dict[str, str]], stream: bool = False, **kwargs) -> Any:
+        """Chat completion through the legacy openai module."""
+        return self.client.ChatCompletion.create(
+            engine=self.deployment_name,
+            messages=messages,
+            stream=stream,
+            **kwargs
+        )
+    
+    def _v1_completion(self, prompt_text: str, stream: bool = False, **kwargs) -> Any:
+        """Text completion through the openai>=1.0 client."""
+        return self.client.completions.create(
+            deployment_name=self.deployment_name,
+            prompt=prompt_text,
+            stream=stream,
+            **kwargs
+        )
+    
+    def _legacy_completion(self, prompt_text: str, stream: bool = False, **kwargs) -> Any:
+        """Text completion through the legacy openai module."""
+        return self.client.Completion.create(
+            engine=self.deployment_name,
+            prompt=prompt_text,
+            stream=stream,
+            **kwargs
+        )
     
     def count_tokens(self, text: Union[str, List[Dict[str, str]]]) -> int:
         """
@@ -203,16 +254,4 @@ class AzureOpenAIMonitor(BaseProviderMonitor):
         Returns:
             Token count
         """
-        # Map Azure model names to OpenAI model names for tokenization
-        model_mapping = {
-            "gpt-35-turbo": "gpt-3.5-turbo",
-            "gpt-35-turbo-16k": "gpt-3.5-turbo-16k",
-            "gpt-4": "gpt-4",
-            "gpt-4-32k": "gpt-4-32k",
-            "gpt-4-vision": "gpt-4-vision-preview",
-        }
-        
-        # Get the equivalent OpenAI model for tokenization
-        openai_model = model_mapping.get(self.model, self.model)
-        
-        return TokenCounter.count_openai_tokens(text, openai_model)
+        return TokenCounter.count_openai_tokens(text, self._openai_model)
@@ -37,4 +37,8 @@ class BaseProviderMonitor(ABC):
         
     def _monitor_call(self, prompt: str, client_func, **kwargs):
         """Common monitoring wrapper for all providers."""
-        return self.monitor.call(prompt, client_func, **kwargs)
\ No newline at end of file
+        return self.monitor.call(prompt, client_func, **kwargs)
+    
+    def _monitor_stream(self, prompt: str, client_func, **kwargs):
+        """Common monitoring wrapper for streaming calls."""
+        return self.monitor.stream(prompt, client_func, **kwargs)
\ No newline at end of file
@@ -1,4 +1,5 @@
 # sentinelops/sdk/sentinelops/providers/huggingface.py
+import io
 import time
 import logging
 from typing import Dict, Any, List, Optional, Union
@@ -35,6 +36,15 @@ class HuggingFaceMonitor(LLMMonitor):
         self.use_inference_api = use_inference_api
         self._setup_client()
         
+        # Bind the backend-specific client functions once instead of building
+        # a closure on every call
+        if use_inference_api:
+            self._text_generation_fn = self._inference_text_generation
+            self._chat_fn = self._inference_chat
+        else:
+            self._text_generation_fn = self._pipeline_text_generation
+            self._chat_fn = self._pipeline_chat
+        
     def _setup_client(self):
         """Set up the appropriate client based on configuration."""
         try:
@@ -70,23 +80,13 @@ class HuggingFaceMonitor(LLMMonitor):
         Returns:
             Response from the model
         """
-        def client_function(prompt_text, **kw):
-            if self.use_inference_api:
-                return self.client.text_generation(
-                    prompt_text,
-                    max_new_tokens=max_new_tokens,
-                    temperature=temperature,
-                    **kw
-                )
-            else:
-                return self.client(
-                    prompt_text,
-                    max_new_tokens=max_new_tokens,
-                    temperature=temperature,
-                    **kw
-                )
-                
-        return self.call(prompt, client_function, **kwargs)
+        return self.call(
+            prompt,
+            self._text_generation_fn,
+            max_new_tokens=max_new_tokens,
+            temperature=temperature,
+            **kwargs
+        )
     
     def chat(
         self,
@@ -106,42 +106,41 @@ class HuggingFaceMonitor(LLMMonitor):
         # Convert messages to prompt format that HF understands
         prompt = self._format_chat_messages(messages)
         
-        def client_function(prompt_text, **kw):
-            if self.use_inference_api:
-                return self.client.chat(
-                    messages=messages,
-                    **kw
-                )
-            else:
-                # For local models, we need to adjust how we call the pipeline
-                # based on its type
-                if self.client.task == "text-generation":
-                    return self.client(
-                        prompt_text,
-                        **kw
-                    )
-                else:
-                    # Assume it's a chat pipeline
-                    return self.client(messages, **kw)
-        
-        return self.call(prompt, client_function, **kwargs)
+        return self.call(prompt, self._chat_fn, messages=messages, **kwargs)
+    
+    def _inference_text_generation(self, prompt_text: str, **kwargs) -> Any:
+        """Text generation through the Inference API."""
+        return self.client.text_generation(prompt_text, **kwargs)
+    
+    def _pipeline_text_generation(self, prompt_text: str, **kwargs) -> Any:
+        """Text generation through a local Transformers pipeline."""
+        return self.client(prompt_text, **kwargs)
+    
+    def _inference_chat(self, prompt_text: str, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """Chat through the Inference API."""
+        return self.client.chat(messages=messages, **kwargs)
+    
+    def _pipeline_chat(self, prompt_text: str, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """Chat through a local Transformers pipeline."""
+        # For local models, we need to adjust how we call the pipeline
+        # based on its type
+        if self.client.task == "text-generation":
+            return self.client(prompt_text, **kwargs)
+        else:
+            # Assume it's a chat pipeline
+            return self.client(messages, **kwargs)
     
     def _format_chat_messages(self, messages: List[Dict[str, str]]) -> str:
         """Format chat messages into a single prompt string."""
-        formatted = []
+        # Stream into one buffer instead of building a list of parts to join
+        buf = io.StringIO()
         for msg in messages:
             role = msg.get("role", "user").lower()
             content = msg.get("content", "")
-            if role == "system":
-                formatted.append(f"<system>\n{content}\n</system>")
-            elif role == "user":
-                formatted.append(f"<user>\n{content}\n</user>")
-            elif role == "assistant":
-                formatted.append(f"<assistant>\n{content}\n</assistant>")
-            else:
-                formatted.append(f"<{role}>\n{content}\n</{role}>")
+            buf.write(f"<{role}>\n{content}\n</{role}>\n")
         
-        return "\n".join(formatted)
+        # Drop the separator written after the last message
+        return buf.getvalue()[:-1]
     
     def _extract_completion_text(self, response: Any) -> str:
         """Extract completion text from the API response."""
@@ -3,66 +3,259 @@ import time
 import uuid
 import logging
 import json
-from typing import Dict, Any, Optional, List, Union
+import functools
+import contextlib
+import re
+import queue
+import threading
+import itertools
+import weakref
+from typing import Dict, Any, Optional, List, Tuple, Union
 import os
 from .batching import BatchProcessor
 from .caching import ResponseCache
+from .utils.error_handling import categorize_error
 
-# OpenTelemetry imports
+try:
+    import orjson
+    
+    def _serialize_event(data: Dict[str, Any]) -> bytes:
+        return orjson.dumps(data)
+except ImportError:
+    def _serialize_event(data: Dict[str, Any]) -> bytes:
+        return json.dumps(data).encode('utf-8')
+
+# OpenTelemetry API imports; the SDK and OTLP exporters are only imported
+# when the first monitor is created (see _configure_otel)
 from opentelemetry import trace
 from opentelemetry import metrics
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
-
-# Configure OpenTelemetry
-resource = Resource(attributes={"service.name": "llm-monitoring"})
-
-# Trace provider setup
-trace_provider = TracerProvider(resource=resource)
-otlp_trace_exporter = OTLPSpanExporter(endpoint=os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "localhost:4317"))
-trace_provider.add_span_processor(BatchSpanProcessor(otlp_trace_exporter))
-trace.set_tracer_provider(trace_provider)
-
-# Metrics provider setup
-metric_reader = PeriodicExportingMetricReader(
-    OTLPMetricExporter(endpoint=os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "localhost:4317"))
-)
-metric_provider = MeterProvider(resource=resource, metric_readers=[metric_reader])
-metrics.set_meter_provider(metric_provider)
-
-# Get tracer and meter
-tracer = trace.get_tracer(__name__)
-meter = metrics.get_meter(__name__)
-
-# Create metrics
-inference_time_metric = meter.create_histogram(
-    name="llm.inference.time", 
-    description="Time taken for LLM inference in seconds",
-    unit="s",
-)
-
-token_count_metric = meter.create_histogram(
-    name="llm.token.count",
-    description="Number of tokens in LLM request/response",
-    unit="tokens",
-)
-
-request_counter = meter.create_counter(
-    name="llm.requests.count",
-    description="Count of LLM API requests",
-    unit="requests",
-)
-
-error_counter = meter.create_counter(
-    name="llm.errors.count",
-    description="Count of LLM API errors",
-    unit="errors",
-)
+
+# Tracer and metric instruments, set by _configure_otel
+tracer = None
+inference_time_metric = None
+token_count_metric = None
+request_counter = None
+error_counter = None
+
+_otel_configured = False
+_otel_lock = threading.Lock()
+
+
+def _configure_otel() -> None:
+    """
+    Set up OpenTelemetry tracing and metrics exporters once per process.
+    Deferred from import time so importing the package (e.g. only for cost
+    calculation) does not pay for loading gRPC exporters.
+    """
+    global tracer, inference_time_metric, token_count_metric, request_counter, error_counter
+    global _otel_configured
+    
+    with _otel_lock:
+        if _otel_configured:
+            return
+        
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.metrics import MeterProvider
+        from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+        
+        # Configure OpenTelemetry
+        resource = Resource(attributes={"service.name": "llm-monitoring"})
+        
+        # Trace provider setup
+        trace_provider = TracerProvider(resource=resource)
+        otlp_trace_exporter = OTLPSpanExporter(endpoint=os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "localhost:4317"))
+        trace_provider.add_span_processor(BatchSpanProcessor(otlp_trace_exporter))
+        trace.set_tracer_provider(trace_provider)
+        
+        # Metrics provider setup
+        metric_reader = PeriodicExportingMetricReader(
+            OTLPMetricExporter(endpoint=os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "localhost:4317"))
+        )
+        metric_provider = MeterProvider(resource=resource, metric_readers=[metric_reader])
+        metrics.set_meter_provider(metric_provider)
+        
+        # Get tracer and meter
+        tracer = trace.get_tracer(__name__)
+        meter = metrics.get_meter(__name__)
+        
+        # Create metrics
+        inference_time_metric = meter.create_histogram(
+            name="llm.inference.time", 
+            description="Time taken for LLM inference in seconds",
+            unit="s",
+        )
+        
+        token_count_metric = meter.create_histogram(
+            name="llm.token.count",
+            description="Number of tokens in LLM request/response",
+            unit="tokens",
+        )
+        
+        request_counter = meter.create_counter(
+            name="llm.requests.count",
+            description="Count of LLM API requests",
+            unit="requests",
+        )
+        
+        error_counter = meter.create_counter(
+            name="llm.errors.count",
+            description="Count of LLM API errors",
+            unit="errors",
+        )
+        
+        _otel_configured = True
+
+# Simplified cost estimation - replace with actual pricing (USD per 1K tokens)
+_COSTS = {
+    "openai": {
+        "gpt-3.5-turbo": {"prompt": 0.0015, "completion": 0.002},
+        "gpt-4": {"prompt": 0.03, "completion": 0.06},
+    },
+    "anthropic": {
+        "claude-instant-1": {"prompt": 0.0008, "completion": 0.0024},
+        "claude-2": {"prompt": 0.008, "completion": 0.024},
+    }
+}
+
+# Request params that vary per call without changing the response
+_NONDETERMINISTIC_PARAMS = frozenset({"stream", "user", "request_id"})
+
+# Splits text into whitespace-prefixed words, mirroring how GPT-style BPE
+# pre-tokenizers attach the leading space to the following word
+_PRETOKEN_PATTERN = re.compile(r"\s*\S+|\s+")
+_PRETOKEN_CACHE_MAX_SIZE = 65536
+
+# Background Kafka publishing: events are queued on the request thread and
+# sent in batches of up to _KAFKA_PUBLISH_BATCH_SIZE, waiting at most
+# _KAFKA_PUBLISH_LINGER seconds for a batch to fill
+_KAFKA_QUEUE_MAX_SIZE = 10000
+_KAFKA_PUBLISH_BATCH_SIZE = 100
+_KAFKA_PUBLISH_LINGER = 0.05
+
+# Queued by close() to tell the publish thread to send what it holds and exit
+_KAFKA_STOP = object()
+
+# Producer defaults for small, frequent telemetry records: wait briefly so
+# records share produce requests, and compress the JSON payloads (lz4 when
+# its codec is installed, gzip otherwise). Any of these can be overridden
+# through kafka_config.
+_KAFKA_PRODUCER_DEFAULTS = {
+    "linger_ms": 50,
+    "batch_size": 64 * 1024,
+    "compression_type": "gzip",
+    "buffer_memory": 64 * 1024 * 1024,
+}
+
+# Request IDs are a random per-process prefix plus a counter, which keeps them
+# unique across processes without reading os.urandom on every LLM call
+_request_id_prefix = uuid.uuid4().hex
+_request_counter = itertools.count()
+
+
+def _reset_request_ids() -> None:
+    """Give forked children their own request ID prefix."""
+    global _request_id_prefix, _request_counter
+    _request_id_prefix = uuid.uuid4().hex
+    _request_counter = itertools.count()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_request_ids)
+
+
+def new_request_id() -> str:
+    """Return a process-unique request ID."""
+    return f"{_request_id_prefix}-{next(_request_counter)}"
+
+
+# Kafka publishing lives in module-level functions rather than LLMMonitor
+# methods, so the publish thread, the batch processor and the shutdown hook
+# never hold a reference to the monitor itself
+logger = logging.getLogger("llm_monitor")
+
+
+def _log_send_error(exc: Exception) -> None:
+    """Log records the producer failed to deliver."""
+    logger.error(f"Failed to deliver event to Kafka: {str(exc)}")
+
+
+def _publish_batch_to_kafka(producer, items: List[Dict[str, Any]]) -> None:
+    """Publish a batch of data to Kafka."""
+    if not producer:
+        return
+        
+    try:
+        # Skip repeated request IDs to avoid duplicate messages
+        seen = set()
+        for data in items:
+            request_id = data.get("request_id", "unknown")
+            if request_id in seen:
+                continue
+            seen.add(request_id)
+            producer.send(
+                topic="llm-monitoring", 
+                value=_serialize_event(data),
+                key=request_id.encode('utf-8')
+            ).add_errback(_log_send_error)
+    except Exception as e:
+        logger.error(f"Failed to publish batch to Kafka: {str(e)}")
+
+
+def _kafka_publish_loop(producer, kafka_queue: queue.Queue) -> None:
+    """
+    Background thread that drains queued events and publishes them in
+    batches, until _shutdown_kafka queues _KAFKA_STOP.
+    """
+    stopping = False
+    while not stopping:
+        item = kafka_queue.get()
+        if item is _KAFKA_STOP:
+            return
+        batch = [item]
+        try:
+            while len(batch) < _KAFKA_PUBLISH_BATCH_SIZE:
+                item = kafka_queue.get(timeout=_KAFKA_PUBLISH_LINGER)
+                if item is _KAFKA_STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+        except queue.Empty:
+            pass
+        
+        _publish_batch_to_kafka(producer, batch)
+
+
+def _shutdown_kafka(
+    producer,
+    batch_processor: Optional[BatchProcessor],
+    kafka_queue: Optional[queue.Queue],
+    kafka_thread: Optional[threading.Thread],
+    timeout: float = 10.0
+) -> None:
+    """
+    Publish pending events and flush the producer. Runs once per monitor,
+    from LLMMonitor.close(), when the monitor is garbage collected, or at
+    interpreter exit, whichever comes first.
+    """
+    if batch_processor:
+        batch_processor.stop()
+    elif kafka_queue is not None:
+        # The stop marker queues behind every pending event, so joining the
+        # thread waits for the batch it is lingering on as well
+        try:
+            kafka_queue.put(_KAFKA_STOP, timeout=timeout)
+            kafka_thread.join(timeout=timeout)
+        except queue.Full:
+            logger.error("Kafka publish queue did not drain, pending events dropped")
+    
+    try:
+        producer.flush(timeout=timeout)
+    except Exception as e:
+        logger.error(f"Failed to flush Kafka producer: {str(e)}")
 
 class LLMMonitor:
     """
@@ -79,6 +272,7 @@ class LLMMonitor:
         log_requests: bool = True,
         log_responses: bool = True,
         token_counter = None,  # Optional custom token counter
+        pretokenize_counts: bool = False,  # Sum cached per-word counts (counter must be additive)
         kafka_config: Optional[Dict[str, Any]] = None,
         # New parameters for batching
         enable_batching: bool = False,
@@ -89,30 +283,75 @@ class LLMMonitor:
         cache_ttl: int = 3600,
         cache_max_size: int = 1000,
         disk_cache: bool = False,
-        cache_dir: Optional[str] = None
+        cache_dir: Optional[str] = None,
+        track_memory: bool = False  # Sample process RSS before and after each call
     ): 
+        _configure_otel()
+        
         self.provider = provider
         self.model = model
+        
+        # Resolve per-token pricing once instead of on every request
+        model_costs = _COSTS.get(provider, {}).get(model, {"prompt": 0, "completion": 0})
+        self._prompt_cost_per_token = model_costs["prompt"] / 1000
+        self._completion_cost_per_token = model_costs["completion"] / 1000
+        
         self.application_name = application_name
         self.environment = environment
+        
+        # Fields shared by every published event from this monitor
+        self._base_record = {
+            "provider": provider,
+            "model": model,
+            "application": application_name,
+            "environment": environment,
+        }
+        
+        # Metric attribute sets, built once rather than on every request
+        self._metric_attrs = {"provider": provider, "model": model}
+        self._success_attrs = {
+            True: {**self._metric_attrs, "success": True},
+            False: {**self._metric_attrs, "success": False},
+        }
+        self._prompt_token_attrs = {**self._metric_attrs, "token_type": "prompt"}
+        self._completion_token_attrs = {**self._metric_attrs, "token_type": "completion"}
+        
         self.log_requests = log_requests
         self.log_responses = log_responses
         self.token_counter = token_counter
+        self.pretokenize_counts = pretokenize_counts
+        self._pretoken_count_cache = {}  # model -> {pretoken: count}
+        
+        # Memoize the custom token counter so repeated prompts (system prompts,
+        # few-shot templates, retries) are only tokenized once
+        counter = self._count_pretokens if pretokenize_counts else token_counter
+        self._cached_token_counter = (
+            functools.lru_cache(maxsize=4096)(counter) if token_counter else None
+        )
         
         # Kafka producer setup (if configured)
         self.kafka_producer = None
         if kafka_config:
             try:
                 from kafka import KafkaProducer
-                self.kafka_producer = KafkaProducer(**kafka_config)
+                from kafka.codec import has_lz4
+                
+                producer_config = dict(_KAFKA_PRODUCER_DEFAULTS)
+                if has_lz4():
+                    producer_config["compression_type"] = "lz4"
+                producer_config.update(kafka_config)
+                self.kafka_producer = KafkaProducer(**producer_config)
             except ImportError:
                 logging.warning("Kafka not installed. Run 'pip install kafka-python' to enable Kafka integration.")
+        
+        # Event records are only worth building when Kafka will receive them
+        self._publish_events = self.kafka_producer is not None
                 
         # Initialize batch processor if enabled
         self.enable_batching = enable_batching
         if enable_batching:
             self.batch_processor = BatchProcessor(
-                process_func=self._publish_batch_to_kafka,
+                process_func=functools.partial(_publish_batch_to_kafka, self.kafka_producer),
                 batch_size=batch_size,
                 flush_interval=flush_interval
             )
@@ -132,80 +371,116 @@ class LLMMonitor:
             self.cache = None
             
         # Setup logger
-        self.logger = logging.getLogger("llm_monitor")
+        self.logger = logger
         
-    def _count_tokens(self, text: str, model: str) -> int:
-        """Count tokens in text. Uses custom counter if provided, otherwise estimates."""
-        if self.token_counter:
-            return self.token_counter(text, model)
+        # Keep one process handle for memory sampling instead of opening a
+        # new one twice per request
+        self.track_memory = track_memory
+        self._process = None
+        if track_memory:
+            try:
+                import psutil
+                self._process = psutil.Process(os.getpid())
+            except ImportError:
+                self.logger.warning("psutil not installed. Run 'pip install psutil' to track memory usage.")
         
-        # Simple estimation (~4 characters per token for English text)
-        # In production, use tiktoken or the appropriate tokenizer for your model
-        return len(text) // 4
-    
-    def _calculate_cost(self, prompt_tokens: int, completion_tokens: int) -> float:
-        """Estimate cost based on token usage and provider/model."""
-        # Simplified cost estimation - replace with actual pricing
-        costs = {
-            "openai": {
-                "gpt-3.5-turbo": {"prompt": 0.0015, "completion": 0.002},
-                "gpt-4": {"prompt": 0.03, "completion": 0.06},
-            },
-            "anthropic": {
-                "claude-instant-1": {"prompt": 0.0008, "completion": 0.0024},
-                "claude-2": {"prompt": 0.008, "completion": 0.024},
-            }
-        }
+        # Publish unbatched events from a background thread so the request
+        # path never waits on Kafka
+        self._kafka_queue = None
+        self._kafka_thread = None
+        self._closed = False
+        if self.kafka_producer and not self.batch_processor:
+            self._kafka_queue = queue.Queue(maxsize=_KAFKA_QUEUE_MAX_SIZE)
+            self._kafka_thread = threading.Thread(
+                target=_kafka_publish_loop,
+                args=(self.kafka_producer, self._kafka_queue),
+                daemon=True
+            )
+            self._kafka_thread.start()
         
-        try:
-            model_costs = costs.get(self.provider, {}).get(self.model, {"prompt": 0, "completion": 0})
-            return (prompt_tokens / 1000 * model_costs["prompt"]) + (completion_tokens / 1000 * model_costs["completion"])
-        except (KeyError, TypeError):
-            return 0
+        # Sends are no longer flushed per batch, so deliver whatever the
+        # producer still holds when the monitor is collected or the
+        # interpreter exits. The finalizer only references the Kafka
+        # plumbing, so short-lived monitors can still be collected.
+        self._kafka_finalizer = None
+        if self.kafka_producer:
+            self._kafka_finalizer = weakref.finalize(
+                self, _shutdown_kafka,
+                self.kafka_producer, self.batch_processor, self._kafka_queue, self._kafka_thread
+            )
+        
+    def _count_tokens(self, text: str, model: str, memoize: bool = True) -> int:
+        """
+        Count tokens in text. Uses custom counter if provided, otherwise estimates.
+        Pass memoize=False for one-off text such as fresh completions so it does
+        not evict repeated prompts from the counter's LRU cache.
+        """
+        counter = self._cached_token_counter
+        if counter is None:
+            # Simple estimation (~4 characters per token for English text)
+            # In production, use tiktoken or the appropriate tokenizer for your model
+            return len(text) // 4
+        
+        if not memoize:
+            return counter.__wrapped__(text, model)
+        return counter(text, model)
     
-    def _publish_batch_to_kafka(self, items: List[Dict[str, Any]]) -> None:
-        """Publish a batch of data to Kafka."""
-        if not self.kafka_producer:
-            return
+    def _count_pretokens(self, text: str, model: str) -> int:
+        """
+        Count tokens by summing cached per-pretoken counts.
+        Growing chat histories share most of their words with the previous turn,
+        so only pieces not seen before reach the custom token counter.
+        """
+        cache = self._pretoken_count_cache.setdefault(model, {})
+        if len(cache) > _PRETOKEN_CACHE_MAX_SIZE:
+            cache.clear()
             
-        try:
-            # Group by request ID to avoid duplicate messages
-            by_request_id = {}
-            for item in items:
-                request_id = item.get("request_id", "unknown")
-                by_request_id[request_id] = item
-                
-            # Send each unique item
-            for request_id, data in by_request_id.items():
-                self.kafka_producer.send(
-                    topic="llm-monitoring", 
-                    value=json.dumps(data).encode('utf-8'),
-                    key=request_id.encode('utf-8')
-                )
-                
-            # Ensure messages are sent
-            self.kafka_producer.flush()
-        except Exception as e:
-            self.logger.error(f"Failed to publish batch to Kafka: {str(e)}")
+        total = 0
+        for piece in _PRETOKEN_PATTERN.findall(text):
+            count = cache.get(piece)
+            if count is None:
+                count = cache[piece] = self.token_counter(piece, model)
+            total += count
+        return total
+    
+    def _calculate_cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        """Estimate cost based on token usage and provider/model."""
+        return (
+            prompt_tokens * self._prompt_cost_per_token
+            + completion_tokens * self._completion_cost_per_token
+        )
     
     def _publish_to_kafka(self, data: Dict[str, Any]) -> None:
         """Publish data to Kafka, either directly or via batch processor."""
+        if self._closed:
+            self.logger.warning("Monitor is closed, monitoring event dropped")
+            return
         if self.enable_batching and self.batch_processor:
             self.batch_processor.add(data)
-        elif self.kafka_producer:
+        elif self._kafka_queue is not None:
             try:
-                self.kafka_producer.send(
-                    topic="llm-monitoring", 
-                    value=json.dumps(data).encode('utf-8'),
-                    key=str(data.get("request_id", "unknown")).encode('utf-8')
-                )
-            except Exception as e:
-                self.logger.error(f"Failed to publish to Kafka: {str(e)}")
+                self._kafka_queue.put_nowait(data)
+            except queue.Full:
+                self.logger.warning("Kafka publish queue is full, monitoring event dropped")
+    
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Publish pending events and flush the Kafka producer. Events passed to
+        the monitor after close() are dropped.
+        """
+        if self._kafka_finalizer is None:
+            return
+        self._closed = True
+        if self._kafka_finalizer.detach():
+            _shutdown_kafka(
+                self.kafka_producer, self.batch_processor, self._kafka_queue, self._kafka_thread, timeout
+            )
     
     def call(
         self, 
         prompt: str,
         client_function,  # The actual API function to call
+        prompt_tokens: Optional[int] = None,  # Precomputed prompt token count
         **kwargs  # Additional arguments to pass to the client function
     ) -> Dict[str, Any]:
         """
@@ -214,44 +489,135 @@ class LLMMonitor:
         Args:
             prompt: The prompt text
             client_function: The API client function to call
+            prompt_tokens: Prompt token count, if the caller already knows it
             **kwargs: Additional arguments to pass to the client function
             
         Returns:
             The API response
         """
         # Check cache if enabled
-        if self.enable_caching and self.cache:
-            cache_key_params = dict(kwargs)
+        cache_params = self._cache_params(kwargs)
+        cached_response = self._get_cached_response(prompt, prompt_tokens, cache_params)
+        if cached_response:
+            return cached_response
+        
+        with self._monitor_request(prompt, prompt_tokens, cache_params) as outcome:
+            outcome["response"] = client_function(prompt, **kwargs)
+        
+        return outcome["response"]
+    
+    async def acall(
+        self, 
+        prompt: str,
+        client_function,  # Coroutine function performing the API call
+        prompt_tokens: Optional[int] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Monitor an async LLM API call; the async counterpart of call().
+        
+        Args:
+            prompt: The prompt text
+            client_function: Async API client function to await
+            prompt_tokens: Prompt token count, if the caller already knows it
+            **kwargs: Additional arguments to pass to the client function
+            
+        Returns:
+            The API response
+        """
+        cache_params = self._cache_params(kwargs)
+        cached_response = self._get_cached_response(prompt, prompt_tokens, cache_params)
+        if cached_response:
+            return cached_response
+        
+        with self._monitor_request(prompt, prompt_tokens, cache_params) as outcome:
+            outcome["response"] = await client_function(prompt, **kwargs)
+        
+        return outcome["response"]
+    
+    def stream(
+        self, 
+        prompt: str,
+        client_function,  # API function returning an iterator of chunks
+        **kwargs
+    ):
+        """
+        Monitor a streaming LLM API call.
+        
+        Chunks are yielded untouched and the call is published once the stream
+        is exhausted, or as cancelled with what was streamed so far if the
+        consumer stops early. Token counts come from the usage block providers
+        attach to the final chunk; when no usage arrives, the streamed text is
+        counted instead.
+        
+        Args:
+            prompt: The prompt text
+            client_function: The API client function to call
+            **kwargs: Additional arguments to pass to the client function
             
-            # Remove non-deterministic params from cache key
-            for param in ['stream', 'user', 'request_id']:
-                if param in cache_key_params:
-                    del cache_key_params[param]
-                    
+        Yields:
+            The response chunks
+        """
+        with self._monitor_request(prompt, None, None, streamed=True) as outcome:
+            pieces = outcome["completion_pieces"] = []
+            for chunk in client_function(prompt, **kwargs):
+                usage = self._extract_usage(chunk)
+                if usage:
+                    outcome["usage"] = usage
+                pieces.append(self._extract_chunk_text(chunk))
+                yield chunk
+    
+    def _cache_params(self, kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the request params that make up the cache key, or None if caching is disabled."""
+        if not (self.enable_caching and self.cache):
+            return None
+        
+        # Remove non-deterministic params from cache key
+        return {k: v for k, v in kwargs.items() if k not in _NONDETERMINISTIC_PARAMS}
+    
+    def _get_cached_response(
+        self, prompt: str, prompt_tokens: Optional[int], cache_params: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Return a cached response for this request, recording the hit, if caching is enabled."""
+        if cache_params is not None:
             cached_response = self.cache.get(
                 provider=self.provider,
                 model=self.model,
                 prompt=prompt,
-                params=cache_key_params
+                params=cache_params
             )
             
             if cached_response:
                 # Track cache hit in metrics
-                self._record_cache_hit(prompt, cached_response)
+                self._record_cache_hit(prompt, cached_response, prompt_tokens)
                 return cached_response
+        
+        return None
+    
+    @contextlib.contextmanager
+    def _monitor_request(
+        self,
+        prompt: str,
+        prompt_tokens: Optional[int],
+        cache_params: Optional[Dict[str, Any]],
+        streamed: bool = False
+    ):
         """
-        Monitor an LLM API call.
+        Trace, measure and publish a single LLM API call.
         
-        Args:
-            prompt: The prompt text
-            client_function: The API client function to call
-            **kwargs: Additional arguments to pass to the client function
-            
-        Returns:
-            The API response
+        Yields a dict whose "response" key the caller sets from inside the
+        with-block; shared by call() and acall(). Successful responses are
+        cached under cache_params unless it is None.
+        
+        stream() passes streamed=True and instead sets "usage" and
+        "completion_pieces" as chunks arrive. Its with-block yields to the
+        consumer between chunks, so the span is started and ended explicitly
+        rather than made current, and closing the stream early records the
+        call as cancelled.
         """
-        request_id = str(uuid.uuid4())
+        request_id = new_request_id()
         start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         # Create context for span
         context = {
@@ -262,11 +628,14 @@ class LLMMonitor:
             "environment": self.environment,
         }
         
-        # Start the span
-        with tracer.start_as_current_span("llm_api_call", attributes=context) as span:
-            # Count tokens in prompt
-            prompt_tokens = self._count_tokens(prompt, self.model)
-            span.set_attribute("prompt.tokens", prompt_tokens)
+        # Start the span; only unstreamed calls make it the current span,
+        # since a stream's context would otherwise be detached from whatever
+        # frame resumes the generator last
+        with contextlib.ExitStack() as scope:
+            span = tracer.start_span("llm_api_call", attributes=context)
+            scope.callback(span.end)
+            if not streamed:
+                scope.enter_context(trace.use_span(span))
             
             # Record prompt (if enabled)
             if self.log_requests:
@@ -276,58 +645,81 @@ class LLMMonitor:
             memory_before = self._get_memory_usage()
             span.set_attribute("memory.before", memory_before)
             
-            # Make the API call
-            response = None
+            # Make the API call (the caller runs it inside the with-block)
+            outcome = {"response": None}
             error = None
+            error_type = None
+            cancelled = None
             try:
-                response = client_function(prompt, **kwargs)
+                yield outcome
+                success = True
+            except GeneratorExit as e:
+                # The consumer stopped reading the stream; record what it got
+                cancelled = e
                 success = True
+                span.set_attribute("stream.cancelled", True)
             except Exception as e:
                 error = str(e)
+                error_type = categorize_error(e)
                 success = False
                 span.record_exception(e)
                 span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
                 
+            response = outcome["response"]
+            
+            # Streamed calls have no response object left to inspect; stream()
+            # reports usage and completion through the outcome instead
+            completed = success and bool(response or streamed)
+            
+            # Prefer the provider's reported usage; tokenize only when it is missing
+            usage = outcome.get("usage")
+            if usage is None and completed and not streamed:
+                usage = self._extract_usage(response)
+            if usage:
+                prompt_tokens = usage[0]
+            elif prompt_tokens is None:
+                prompt_tokens = self._count_tokens(prompt, self.model)
+            span.set_attribute("prompt.tokens", prompt_tokens)
+            
             # Calculate timing
-            end_time = time.time()
-            inference_time = end_time - start_time
+            inference_time = (time.perf_counter_ns() - start_ns) / 1e9
             
             # Record metrics
             inference_time_metric.record(
                 inference_time,
-                attributes={
-                    "provider": self.provider,
-                    "model": self.model,
-                    "success": success,
-                }
+                attributes=self._success_attrs[success]
             )
             
             request_counter.add(
                 1,
-                attributes={
-                    "provider": self.provider,
-                    "model": self.model,
-                    "success": success,
-                }
+                attributes=self._success_attrs[success]
             )
             
             if not success:
+                # Error categories keep the error_type cardinality bounded
                 error_counter.add(
                     1,
                     attributes={
-                        "provider": self.provider,
-                        "model": self.model,
-                        "error_type": error[:100] if error else "unknown",
+                        **self._metric_attrs,
+                        "error_type": error_type,
                     }
                 )
             
             # Process successful response
-            if success and response:
+            if completed:
                 # Extract completion text (adjust based on API response format)
-                completion_text = self._extract_completion_text(response)
+                if streamed:
+                    completion_text = "".join(outcome.get("completion_pieces", ()))
+                else:
+                    completion_text = self._extract_completion_text(response)
                 
                 # Count response tokens
-                completion_tokens = self._count_tokens(completion_text, self.model)
+                if usage:
+                    completion_tokens = usage[1]
+                else:
+                    completion_tokens = self._count_tokens(
+                        completion_text, self.model, memoize=False
+                    )
                 span.set_attribute("completion.tokens", completion_tokens)
                 
                 # Record response (if enabled)
@@ -344,20 +736,12 @@ class LLMMonitor:
                 # Record token metrics
                 token_count_metric.record(
                     prompt_tokens,
-                    attributes={
-                        "provider": self.provider,
-                        "model": self.model,
-                        "token_type": "prompt",
-                    }
+                    attributes=self._prompt_token_attrs
                 )
                 
                 token_count_metric.record(
                     completion_tokens,
-                    attributes={
-                        "provider": self.provider,
-                        "model": self.model,
-                        "token_type": "completion",
-                    }
+                    attributes=self._completion_token_attrs
                 )
             
             # Track memory after call
@@ -365,82 +749,87 @@ class LLMMonitor:
             span.set_attribute("memory.after", memory_after)
             span.set_attribute("memory.used", memory_after - memory_before)
             
-            # Prepare monitoring data
-            monitoring_data = {
-                "request_id": request_id,
-                "timestamp": start_time,
-                "provider": self.provider,
-                "model": self.model,
-                "application": self.application_name,
-                "environment": self.environment,
-                "inference_time": inference_time,
-                "success": success,
-                "prompt_tokens": prompt_tokens,
-                "memory_used": memory_after - memory_before,
-            }
+            # Skip assembling the event record when there is no Kafka sink
+            if self._publish_events:
+                # Prepare monitoring data
+                monitoring_data = {
+                    "request_id": request_id,
+                    "timestamp": start_time,
+                    **self._base_record,
+                    "inference_time": inference_time,
+                    "success": success,
+                    "prompt_tokens": prompt_tokens,
+                    "memory_used": memory_after - memory_before,
+                }
             
-            if success and response:
-                monitoring_data.update({
-                    "completion_tokens": completion_tokens,
-                    "total_tokens": prompt_tokens + completion_tokens,
-                    "estimated_cost": cost,
-                })
+                if completed:
+                    monitoring_data.update({
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                        "estimated_cost": cost,
+                    })
             
-            if error:
-                monitoring_data["error"] = error
+                if error:
+                    monitoring_data["error"] = error
+                    monitoring_data["error_type"] = error_type
                 
-            # Add full request/response if logging is enabled
-            if self.log_requests:
-                monitoring_data["prompt"] = prompt
+                if cancelled:
+                    monitoring_data["cancelled"] = True
+                
+                # Add full request/response if logging is enabled
+                if self.log_requests:
+                    monitoring_data["prompt"] = prompt
             
-            if success and response and self.log_responses:
-                monitoring_data["completion"] = completion_text
+                if completed and self.log_responses:
+                    monitoring_data["completion"] = completion_text
                 
-            # Publish to Kafka if configured
-            self._publish_to_kafka(monitoring_data)
+                # Publish to Kafka if configured
+                self._publish_to_kafka(monitoring_data)
             
             # Store in cache if enabled and successful
-            if self.enable_caching and self.cache and success and response:
-                cache_key_params = dict(kwargs)
-                
-                # Remove non-deterministic params from cache key
-                for param in ['stream', 'user', 'request_id']:
-                    if param in cache_key_params:
-                        del cache_key_params[param]
-                        
+            if cache_params is not None and completed and not streamed:
                 self.cache.put(
                     provider=self.provider,
                     model=self.model,
                     prompt=prompt,
-                    params=cache_key_params,
+                    params=cache_params,
                     response=response
                 )
         
-            # Return the original response or raise the original error
+            # Let the stream finish closing
+            if cancelled:
+                raise cancelled
+            
+            # Re-raise the original error
             if not success and error:
                 raise Exception(error)
-                
-            return response
     
-    def _record_cache_hit(self, prompt: str, response: Dict[str, Any]) -> None:
+    def _record_cache_hit(
+        self, prompt: str, response: Dict[str, Any], prompt_tokens: Optional[int] = None
+    ) -> None:
         """Record metrics for a cache hit."""
+        if not self._publish_events:
+            return
+        
         # Similar to a normal call but marked as cached
-        request_id = str(uuid.uuid4())
+        request_id = new_request_id()
         timestamp = time.time()
         
-        prompt_tokens = self._count_tokens(prompt, self.model)
         completion_text = self._extract_completion_text(response)
-        completion_tokens = self._count_tokens(completion_text, self.model)
+        usage = self._extract_usage(response)
+        if usage:
+            prompt_tokens, completion_tokens = usage
+        else:
+            if prompt_tokens is None:
+                prompt_tokens = self._count_tokens(prompt, self.model)
+            completion_tokens = self._count_tokens(completion_text, self.model)
         total_tokens = prompt_tokens + completion_tokens
         
         # Prepare monitoring data for cache hit
         monitoring_data = {
             "request_id": request_id,
             "timestamp": timestamp,
-            "provider": self.provider,
-            "model": self.model,
-            "application": self.application_name,
-            "environment": self.environment,
+            **self._base_record,
             "inference_time": 0,  # Zero inference time for cache hit
             "success": True,
             "prompt_tokens": prompt_tokens,
@@ -482,15 +871,69 @@ class LLMMonitor:
                         return response[key]
             return str(response)
     
+    def _extract_chunk_text(self, chunk: Any) -> str:
+        """
+        Extract the text a streamed chunk adds to the completion, or "" if none.
+        Handles both dict chunks and the objects openai>=1.0 and anthropic
+        clients yield.
+        """
+        if isinstance(chunk, str):
+            return chunk
+        
+        def field(obj: Any, name: str) -> Any:
+            if isinstance(obj, dict):
+                return obj.get(name)
+            return getattr(obj, name, None)
+        
+        if self.provider in ("openai", "azure_openai"):
+            # The final usage-only chunk of a v1 stream has no choices
+            choices = field(chunk, "choices")
+            if not choices:
+                return ""
+            text = field(field(choices[0], "delta"), "content")
+        elif self.provider == "anthropic":
+            delta = field(chunk, "delta")
+            text = field(delta, "text") if delta is not None else field(chunk, "completion")
+        else:
+            for key in ["text", "output", "generated_text", "content", "response"]:
+                text = field(chunk, key)
+                if isinstance(text, str):
+                    break
+        return text if isinstance(text, str) else ""
+    
+    def _extract_usage(self, response: Any) -> Optional[Tuple[int, int]]:
+        """
+        Extract (prompt_tokens, completion_tokens) reported by the provider.
+        Handles OpenAI-style "usage" fields on both dict and object responses.
+        Returns None if the response does not carry usage data.
+        """
+        if isinstance(response, dict):
+            usage = response.get("usage")
+        else:
+            usage = getattr(response, "usage", None)
+        if not usage:
+            return None
+            
+        if isinstance(usage, dict):
+            prompt_tokens = usage.get("prompt_tokens")
+            completion_tokens = usage.get("completion_tokens")
+        else:
+            prompt_tokens = getattr(usage, "prompt_tokens", None)
+            completion_tokens = getattr(usage, "completion_tokens", None)
+            
+        if prompt_tokens is None or completion_tokens is None:
+            return None
+        return prompt_tokens, completion_tokens
+    
     def _get_memory_usage(self) -> float:
         """Get current memory usage in MB."""
-        try:
-            import psutil
-            process = psutil.Process(os.getpid())
-            return process.memory_info().rss / (1024 * 1024)  # Convert to MB
-        except ImportError:
-            self.logger.warning("psutil not installed. Run 'pip install psutil' to track memory usage.")
+        if self._process is None:
             return 0
+        
+        # A forked child must not keep reporting its parent's memory
+        if self._process.pid != os.getpid():
+            self._process = type(self._process)(os.getpid())
+        return self._process.memory_info().rss / (1024 * 1024)  # Convert to MB
 
 
 # Example wrapper for OpenAI
@@ -1,3 +1,4 @@
+import re
 import logging
 from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
@@ -61,6 +62,37 @@ class CostCalculator:
         }
     }
     
+    # Fallback patterns for models missing from PRICING, checked in order
+    # Format: {provider: [(pattern, priced model), ...]}
+    _SIMILAR_MODEL_PATTERNS = {
+        "openai": [
+            (re.compile(r"gpt-4"), "gpt-4"),
+            (re.compile(r"gpt-3\.5|gpt-35"), "gpt-3.5-turbo"),
+        ],
+        "anthropic": [
+            (re.compile(r"claude-3.*haiku"), "claude-3-haiku"),
+            (re.compile(r"claude-3.*sonnet"), "claude-3-sonnet"),
+            (re.compile(r"claude-3.*opus"), "claude-3-opus"),
+            (re.compile(r"claude-2"), "claude-2"),
+            (re.compile(r"claude-instant"), "claude-instant-1"),
+        ],
+    }
+    
+    # Per-token (prompt, completion) rates keyed by (provider, model), derived
+    # from PRICING by _build_flat_pricing so lookups skip the nested dicts
+    _FLAT_PRICING: Dict[Tuple[str, str], Tuple[float, float]] = {}
+    _FLAT_PRICING_SOURCE: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None
+    
+    @classmethod
+    def _build_flat_pricing(cls) -> None:
+        """Rebuild the flat per-token rate table from PRICING."""
+        cls._FLAT_PRICING = {
+            (provider.lower(), model.lower()): (costs["prompt"] / 1000, costs["completion"] / 1000)
+            for provider, models in cls.PRICING.items()
+            for model, costs in models.items()
+        }
+        cls._FLAT_PRICING_SOURCE = cls.PRICING
+    
     @staticmethod
     def calculate_cost(
         provider: str, 
@@ -94,16 +126,25 @@ class CostCalculator:
         
         # Try to get pricing for the specific model
         try:
-            model_pricing = pricing_data.get(provider, {}).get(model, None)
+            rates = None
+            if not custom_pricing:
+                # PRICING may have been replaced wholesale since the table was built
+                if CostCalculator._FLAT_PRICING_SOURCE is not CostCalculator.PRICING:
+                    CostCalculator._build_flat_pricing()
+                rates = CostCalculator._FLAT_PRICING.get((provider, model))
             
-            # If model not found, try to find a similar model
-            if model_pricing is None:
-                model_pricing = CostCalculator._find_similar_model_pricing(provider, model, pricing_data)
+            if rates is None:
+                model_pricing = pricing_data.get(provider, {}).get(model, None)
                 
-            if model_pricing:
-                prompt_cost = (prompt_tokens / 1000) * model_pricing["prompt"]
-                completion_cost = (completion_tokens / 1000) * model_pricing["completion"]
-                return prompt_cost + completion_cost
+                # If model not found, try to find a similar model
+                if model_pricing is None:
+                    model_pricing = CostCalculator._find_similar_model_pricing(provider, model, pricing_data)
+                
+                if model_pricing:
+                    rates = (model_pricing["prompt"] / 1000, model_pricing["completion"] / 1000)
+                
+            if rates:
+                return prompt_tokens * rates[0] + completion_tokens * rates[1]
             else:
                 logger.warning(f"No pricing data found for {provider}/{model}. Using zero cost.")
                 return 0.0
@@ -132,23 +173,9 @@ class CostCalculator:
         provider_pricing = pricing_data.get(provider, {})
         
         # Common model name patterns
-        if provider == "openai":
-            if "gpt-4" in model:
-                return provider_pricing.get("gpt-4", None)
-            elif "gpt-3.5" in model or "gpt-35" in model:
-                return provider_pricing.get("gpt-3.5-turbo", None)
-        elif provider == "anthropic":
-            if "claude-3" in model:
-                if "haiku" in model:
-                    return provider_pricing.get("claude-3-haiku", None)
-                elif "sonnet" in model:
-                    return provider_pricing.get("claude-3-sonnet", None)
-                elif "opus" in model:
-                    return provider_pricing.get("claude-3-opus", None)
-            elif "claude-2" in model:
-                return provider_pricing.get("claude-2", None)
-            elif "claude-instant" in model:
-                return provider_pricing.get("claude-instant-1", None)
+        for pattern, similar_model in CostCalculator._SIMILAR_MODEL_PATTERNS.get(provider, ()):
+            if pattern.search(model):
+                return provider_pricing.get(similar_model, None)
         
         # If no similar model found, return None
         return None
@@ -180,6 +207,8 @@ class CostCalculator:
                 
             for model, costs in models.items():
                 CostCalculator.PRICING[provider][model] = costs
+        
+        CostCalculator._build_flat_pricing()
     
     @staticmethod
     def estimate_monthly_cost(
@@ -210,4 +239,7 @@ class CostCalculator:
         )
         
         # Multiply by 30 for monthly estimate
-        return daily_cost * 30
\ No newline at end of file
+        return daily_cost * 30
+
+
+CostCalculator._build_flat_pricing()
@@ -1,9 +1,15 @@
 # sentinelops/sdk/sentinelops/utils/error_handling.py
+import re
 import time
+import random
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import traceback
 from typing import Dict, Any, Callable, Optional, List, Tuple, Union
-from functools import wraps
+from functools import wraps, lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +59,84 @@ ERROR_PATTERNS = {
     ]
 }
 
+# Optional Aho-Corasick automaton over every pattern, so an error message is
+# scanned once instead of once per pattern. Values are (priority, category)
+# where priority is the category's position in ERROR_PATTERNS.
+try:
+    import ahocorasick
+    
+    _ERROR_AUTOMATON = ahocorasick.Automaton()
+    for _priority, (_category, _patterns) in enumerate(ERROR_PATTERNS.items()):
+        for _pattern in _patterns:
+            # A pattern listed under several categories belongs to the first
+            if not _ERROR_AUTOMATON.exists(_pattern):
+                _ERROR_AUTOMATON.add_word(_pattern, (_priority, _category))
+    _ERROR_AUTOMATON.make_automaton()
+except ImportError:
+    _ERROR_AUTOMATON = None
+
+# Fallback: one case-insensitive regex with a lookahead per category, tried in
+# ERROR_PATTERNS order; the empty named group that matches names the category
+_ERROR_PATTERN_RE = re.compile(
+    "^(?:" + "|".join(
+        f"(?=.*?(?:{'|'.join(re.escape(pattern) for pattern in patterns)}))(?P<{category}>)"
+        for category, patterns in ERROR_PATTERNS.items()
+    ) + ")",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _match_error_pattern(error_str: str) -> Optional[str]:
+    """Return the first category in ERROR_PATTERNS with a pattern in the message."""
+    if _ERROR_AUTOMATON is not None:
+        best = None
+        for _, match in _ERROR_AUTOMATON.iter(error_str.lower()):
+            if best is None or match < best:
+                best = match
+        return best[1] if best else None
+    
+    match = _ERROR_PATTERN_RE.match(error_str)
+    return match.lastgroup if match else None
+
+# Typed exceptions whose category is known without reading the message, keyed
+# by (top-level package, class name) so provider SDKs never need importing.
+# BadRequestError is left out: it covers both invalid requests and context
+# length overflows, which only the message tells apart.
+ERROR_TYPE_CATEGORIES = {
+    ("builtins", "TimeoutError"): ErrorCategory.TIMEOUT,
+    ("openai", "RateLimitError"): ErrorCategory.RATE_LIMIT,
+    ("openai", "APITimeoutError"): ErrorCategory.TIMEOUT,
+    ("openai", "AuthenticationError"): ErrorCategory.AUTHENTICATION,
+    ("openai", "PermissionDeniedError"): ErrorCategory.PERMISSION,
+    ("openai", "InternalServerError"): ErrorCategory.SERVICE_UNAVAILABLE,
+    ("anthropic", "RateLimitError"): ErrorCategory.RATE_LIMIT,
+    ("anthropic", "APITimeoutError"): ErrorCategory.TIMEOUT,
+    ("anthropic", "AuthenticationError"): ErrorCategory.AUTHENTICATION,
+    ("anthropic", "PermissionDeniedError"): ErrorCategory.PERMISSION,
+    ("anthropic", "InternalServerError"): ErrorCategory.SERVICE_UNAVAILABLE,
+    ("requests", "Timeout"): ErrorCategory.TIMEOUT,
+    ("httpx", "TimeoutException"): ErrorCategory.TIMEOUT,
+}
+
+_type_category_cache: Dict[type, Optional[str]] = {}
+
+def _categorize_error_type(error_type: type) -> Optional[str]:
+    """Return the category for a known exception type or one of its bases."""
+    try:
+        return _type_category_cache[error_type]
+    except KeyError:
+        pass
+    
+    category = None
+    for cls in error_type.__mro__:
+        key = (cls.__module__.partition(".")[0], cls.__name__)
+        if key in ERROR_TYPE_CATEGORIES:
+            category = ERROR_TYPE_CATEGORIES[key]
+            break
+    
+    _type_category_cache[error_type] = category
+    return category
+
 def categorize_error(error: Union[str, Exception]) -> str:
     """
     Categorize an error based on its message or type.
@@ -63,26 +147,26 @@ def categorize_error(error: Union[str, Exception]) -> str:
     Returns:
         Error category
     """
-    # Convert exception to string if needed
+    # Typed provider exceptions are categorized without reading the message
     if isinstance(error, Exception):
+        category = _categorize_error_type(type(error))
+        if category:
+            return category
         error_str = str(error)
     else:
         error_str = error
     
-    error_lower = error_str.lower()
-    
-    # Check for known patterns
-    for category, patterns in ERROR_PATTERNS.items():
-        if any(pattern in error_lower for pattern in patterns):
-            return category
-    
-    # Provider-specific error handling
-    if "openai" in error_lower:
-        if "maximum context length" in error_lower:
-            return ErrorCategory.CONTEXT_LENGTH
-    elif "anthropic" in error_lower:
-        if "prompt too long" in error_lower:
-            return ErrorCategory.CONTEXT_LENGTH
+    return _categorize_error_str(error_str)
+
+@lru_cache(maxsize=2048)
+def _categorize_error_str(error_str: str) -> str:
+    """Categorize an error message; providers repeat the same messages, so results are memoized."""
+    # Check for known patterns. Provider-specific wordings such as OpenAI's
+    # "maximum context length" and Anthropic's "prompt too long" are covered
+    # by the CONTEXT_LENGTH patterns.
+    category = _match_error_pattern(error_str)
+    if category:
+        return category
     
     # Default to unknown
     return ErrorCategory.UNKNOWN
@@ -96,38 +180,67 @@ def handle_error(error: Exception, provider: str) -> Tuple[str, Dict[str, Any]]:
         provider: The LLM provider (openai, anthropic, etc.)
         
     Returns:
-        Tuple of (error_category, error_details)
+        Tuple of (error_category, error_details). The "traceback" detail is
+        a formatted string when debug logging is enabled and None otherwise.
     """
     error_str = str(error)
-    error_category = categorize_error(error)
+    error_category = _categorize_error_type(type(error)) or _categorize_error_str(error_str)
+    
+    # Formatting the traceback walks every frame, so only do it for debugging
+    error_traceback = None
+    if logger.isEnabledFor(logging.DEBUG):
+        error_traceback = "".join(
+            traceback.format_exception(type(error), error, error.__traceback__)
+        )
     
     # Prepare error details
     error_details = {
         "message": error_str,
         "type": error_category,
         "provider": provider,
-        "traceback": traceback.format_exc()
+        "traceback": error_traceback
     }
     
     # Log the error
-    logger.error(f"LLM API error ({provider}/{error_category}): {error_str}")
+    logger.error("LLM API error (%s/%s): %s", provider, error_category, error_str)
     
     return error_category, error_details
 
+# Shared pool for with_retry(background=True), created on first use
+_retry_pool: Optional[ThreadPoolExecutor] = None
+_retry_pool_lock = threading.Lock()
+
+def _get_retry_pool() -> ThreadPoolExecutor:
+    """Return the shared background retry pool, creating it if needed."""
+    global _retry_pool
+    
+    with _retry_pool_lock:
+        if _retry_pool is None:
+            _retry_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sentinelops-retry")
+        return _retry_pool
+
 def with_retry(
     max_retries: int = 3,
     retry_delay: float = 1.0,
     backoff_factor: float = 2.0,
-    retry_on: List[str] = None
+    retry_on: List[str] = None,
+    jitter: bool = False,
+    background: bool = False
 ) -> Callable:
     """
-    Retry decorator for API calls.
+    Retry decorator for API calls. Coroutine functions are retried with
+    asyncio.sleep so a backoff doesn't block the event loop.
     
     Args:
         max_retries: Maximum number of retries
         retry_delay: Initial delay between retries in seconds
         backoff_factor: Multiplier for delay between retries
         retry_on: List of error categories to retry on (default: rate_limit, timeout, service_unavailable)
+        jitter: Scale each delay by a random factor in [0.5, 1.5) so clients
+            rate-limited together don't retry in lockstep
+        background: Run calls and their retries on a shared worker pool. The
+            decorated function returns a concurrent.futures.Future at once;
+            hold on to it to get the result or the final error.
         
     Returns:
         Decorated function
@@ -139,34 +252,89 @@ def with_retry(
             ErrorCategory.SERVICE_UNAVAILABLE
         ]
     
+    # Snapshot the categories; later changes to the caller's list don't apply
+    retry_on = frozenset(retry_on)
+    
+    # Exponential backoff schedule, computed once per decoration
+    delays = tuple(retry_delay * backoff_factor ** i for i in range(max_retries))
+    
+    def next_delay(error: Exception, retries: int, func_name: str) -> Optional[float]:
+        """Return the delay before the next attempt, or None to re-raise."""
+        # Out of retries: propagate without categorizing the error
+        if retries >= max_retries:
+            return None
+        
+        # Typed exceptions don't need stringifying to be categorized
+        error_category = _categorize_error_type(type(error))
+        error_str = None
+        if error_category is None:
+            error_str = str(error)
+            error_category = _categorize_error_str(error_str)
+        
+        # Determine if we should retry
+        if error_category not in retry_on:
+            return None
+        
+        # Deferred formatting; %.100s truncates without slicing a copy
+        logger.warning(
+            "Retry %d/%d for %s after error: %.100s... (category: %s)",
+            retries + 1, max_retries, func_name,
+            error if error_str is None else error_str, error_category
+        )
+        
+        # Exponential backoff
+        delay = delays[retries]
+        if jitter:
+            delay *= 0.5 + random.random()
+        return delay
+    
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            if background:
+                raise ValueError("background retries are not supported for coroutine functions")
+            
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                retries = 0
+                
+                while True:
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        delay = next_delay(e, retries, func.__name__)
+                        if delay is None:
+                            raise
+                    
+                    # Back off outside the except block so the exception and
+                    # the frames its traceback pins are released first
+                    retries += 1
+                    await asyncio.sleep(delay)
+            
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             retries = 0
-            delay = retry_delay
             
             while True:
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    error_category = categorize_error(e)
-                    
-                    # Determine if we should retry
-                    if error_category in retry_on and retries < max_retries:
-                        retries += 1
-                        logger.warning(
-                            f"Retry {retries}/{max_retries} for {func.__name__} "
-                            f"after error: {str(e)[:100]}... "
-                            f"(category: {error_category})"
-                        )
-                        
-                        # Sleep with exponential backoff
-                        time.sleep(delay)
-                        delay *= backoff_factor
-                        continue
-                    else:
-                        # Don't retry
+                    delay = next_delay(e, retries, func.__name__)
+                    if delay is None:
                         raise
+                
+                # Back off outside the except block so the exception and the
+                # frames its traceback pins are released first
+                retries += 1
+                time.sleep(delay)
+        
+        if background:
+            @wraps(func)
+            def background_wrapper(*args, **kwargs):
+                return _get_retry_pool().submit(wrapper, *args, **kwargs)
+            
+            return background_wrapper
         
         return wrapper
     
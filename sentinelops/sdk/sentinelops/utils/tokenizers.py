@@ -1,9 +1,40 @@
 import tiktoken
 import logging
-from typing import Dict, Optional, Union, List
+from typing import Any, Dict, Optional, Union, List
 
 logger = logging.getLogger("sentinelops.tokenizers")
 
+# Loaded tiktoken encoders keyed by model name. Building an encoder parses the
+# BPE ranks file, so it is done once per model rather than on every count.
+_ENCODER_CACHE: Dict[str, Any] = {}
+
+
+def _get_encoder(model: str) -> Any:
+    """Return the cached tiktoken encoder for a model, loading it on first use."""
+    encoding = _ENCODER_CACHE.get(model)
+    if encoding is None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            logger.warning(f"Model {model} not found. Using cl100k_base encoding.")
+            encoding = tiktoken.get_encoding("cl100k_base")
+        encoding = _ENCODER_CACHE.setdefault(model, encoding)
+    return encoding
+
+
+# Loaded Hugging Face tokenizers keyed by model name; from_pretrained reads
+# the vocabulary and merges from disk (or the Hub) on every call
+_HF_TOKENIZER_CACHE: Dict[str, Any] = {}
+
+
+def _get_hf_tokenizer(model: str) -> Any:
+    """Return the cached Hugging Face tokenizer for a model, loading it on first use."""
+    tokenizer = _HF_TOKENIZER_CACHE.get(model)
+    if tokenizer is None:
+        from transformers import AutoTokenizer
+        tokenizer = _HF_TOKENIZER_CACHE.setdefault(model, AutoTokenizer.from_pretrained(model))
+    return tokenizer
+
 class TokenCounter:
     """
     A utility class for counting tokens across different LLM providers and models.
@@ -36,11 +67,7 @@ class TokenCounter:
     @staticmethod
     def count_openai_tokens(text: Union[str, List[Dict[str, str]]], model: str) -> int:
         """Count tokens using OpenAI's tiktoken library."""
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-        except KeyError:
-            logger.warning(f"Model {model} not found. Using cl100k_base encoding.")
-            encoding = tiktoken.get_encoding("cl100k_base")
+        encoding = _get_encoder(model)
         
         if isinstance(text, str):
             # For completion-style API
@@ -80,8 +107,7 @@ class TokenCounter:
         Attempts to load the tokenizer for the specific model.
         """
         try:
-            from transformers import AutoTokenizer
-            tokenizer = AutoTokenizer.from_pretrained(model)
+            tokenizer = _get_hf_tokenizer(model)
             return len(tokenizer.encode(text))
         except Exception as e:
             logger.warning(f"Error loading Hugging Face tokenizer: {str(e)}. Using estimation.")
@@ -37,6 +37,7 @@ setup(
         "anthropic": ["anthropic>=0.5.0"],
         "huggingface": ["transformers>=4.30.0", "huggingface-hub>=0.16.0"],
         "tokenizers": ["tiktoken>=0.4.0", "transformers>=4.30.0"],
+        "speedups": ["orjson>=3.6.0", "lz4>=3.1.0", "xxhash>=3.0.0", "pyahocorasick>=2.0.0"],
         "aws": ["boto3>=1.26.0"],
         "gcp": ["google-cloud-aiplatform>=1.25.0"],
         "azure": ["azure-identity>=1.12.0", "azure-ai-ml>=1.4.0"],
@@ -46,6 +47,10 @@ setup(
             "transformers>=4.30.0",
             "huggingface-hub>=0.16.0",
             "tiktoken>=0.4.0",
+            "orjson>=3.6.0",
+            "lz4>=3.1.0",
+            "xxhash>=3.0.0",
+            "pyahocorasick>=2.0.0",
             "boto3>=1.26.0",
             "google-cloud-aiplatform>=1.25.0",
             "azure-identity>=1.12.0",
@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add the parent directory to the path to import the module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sentinelops.providers.azure_openai import AzureOpenAIMonitor
+
+
+class _StubAzureOpenAIMonitor(AzureOpenAIMonitor):
+    """AzureOpenAIMonitor with a mock client in place of the openai package."""
+
+    client_version = "v1"
+
+    def setup_client(self):
+        self.client = MagicMock()
+
+
+def _object_chunk(content=None, usage=None):
+    """A chunk shaped like the openai>=1.0 client's ChatCompletionChunk."""
+    choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def _dict_chunk(content):
+    """A chunk as yielded by the legacy openai module."""
+    return {"choices": [{"delta": {"content": content}}]}
+
+
+class TestAzureOpenAIStreaming(unittest.TestCase):
+    """Test cases for monitoring streamed Azure OpenAI chat completions."""
+
+    messages = [{"role": "user", "content": "Say hello"}]
+
+    def _monitor(self, client_version):
+        monitor = _StubAzureOpenAIMonitor(api_key="test-key", azure_endpoint="https://example.openai.azure.com")
+        monitor.client_version = client_version
+        monitor._chat_fn = monitor._v1_chat if client_version == "v1" else monitor._legacy_chat
+
+        # Capture the published event instead of sending it to Kafka
+        monitor.monitor._publish_events = True
+        monitor.monitor._publish_to_kafka = MagicMock()
+        return monitor
+
+    def _published_event(self, monitor):
+        monitor.monitor._publish_to_kafka.assert_called_once()
+        return monitor.monitor._publish_to_kafka.call_args[0][0]
+
+    def test_stream_object_chunks(self):
+        """Test that v1 client object chunks record the streamed completion."""
+        monitor = self._monitor("v1")
+        chunks = [
+            _object_chunk("Hello"),
+            _object_chunk(" there"),
+            _object_chunk(usage=SimpleNamespace(prompt_tokens=5, completion_tokens=2)),
+        ]
+        monitor.client.chat.completions.create.return_value = iter(chunks)
+
+        streamed = list(monitor.chat_completion(self.messages, stream=True))
+
+        self.assertEqual(streamed, chunks)
+        event = self._published_event(monitor)
+        self.assertEqual(event["provider"], "azure_openai")
+        self.assertEqual(event["completion"], "Hello there")
+        self.assertEqual(event["prompt_tokens"], 5)
+        self.assertEqual(event["completion_tokens"], 2)
+
+    def test_stream_dict_chunks_without_usage(self):
+        """Test that legacy dict chunks without usage count the streamed text."""
+        monitor = self._monitor("legacy")
+        chunks = [_dict_chunk("Hello"), _dict_chunk(" there, how are you?")]
+        monitor.client.ChatCompletion.create.return_value = iter(chunks)
+
+        streamed = list(monitor.chat_completion(self.messages, stream=True))
+
+        self.assertEqual(streamed, chunks)
+        event = self._published_event(monitor)
+        self.assertEqual(event["completion"], "Hello there, how are you?")
+        self.assertEqual(event["completion_tokens"], len("Hello there, how are you?") // 4)
+        self.assertGreater(event["completion_tokens"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,11 +6,17 @@ from unittest.mock import patch, MagicMock
 # Add the parent directory to the path to import the module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from sentinelops.utils import tokenizers
 from sentinelops.utils.tokenizers import TokenCounter
 
 class TestTokenCounter(unittest.TestCase):
     """Test cases for the TokenCounter class."""
 
+    def setUp(self):
+        # Encoders are cached per model; start each test with a cold cache
+        tokenizers._ENCODER_CACHE.clear()
+        tokenizers._HF_TOKENIZER_CACHE.clear()
+
     def test_estimate_tokens_string(self):
         """Test the fallback token estimation for strings."""
         text = "This is a test string that should be roughly 12 tokens."
@@ -97,6 +103,19 @@ class TestTokenCounter(unittest.TestCase):
         # Should return the length of the encoded list
         self.assertEqual(count, 6)
 
+    @patch('tiktoken.encoding_for_model')
+    def test_openai_encoder_cached(self, mock_encoding_for_model):
+        """Test that the tiktoken encoder is loaded once per model."""
+        mock_encoding = MagicMock()
+        mock_encoding.encode.return_value = [1, 2, 3]
+        mock_encoding_for_model.return_value = mock_encoding
+
+        TokenCounter.count_openai_tokens("first", "gpt-4")
+        TokenCounter.count_openai_tokens("second", "gpt-4")
+
+        mock_encoding_for_model.assert_called_once_with("gpt-4")
+        self.assertEqual(mock_encoding.encode.call_count, 2)
+
     def test_count_tokens_router(self):
         """Test the main count_tokens router function."""
         with patch.object(TokenCounter, 'count_openai_tokens', return_value=10) as mock_openai, \
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Make the top-level sentinelops package importable from every test module,
+# without each module appending its own (possibly duplicate) path entry
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
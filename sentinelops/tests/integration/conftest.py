@@ -1,28 +1,48 @@
 import os
-import sys
 import pytest
 import sqlite3
 from unittest.mock import MagicMock, patch
 from datetime import datetime, timedelta
 
-# Add the project root to the path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-
 # Import the necessary modules
 from sentinelops.backend.api_server.services.alerts import AlertService
 from sentinelops.backend.api_server.models.alerts import AlertConfig, AlertThreshold, AlertType, AlertSeverity
 
-# SQLite in-memory database for testing
-@pytest.fixture
-def test_db_connection():
+_TEST_TABLES = ("request_metrics", "alert_events", "alert_configs")
+
+# Insertable request_metrics columns, in insert_request_metrics row order
+_REQUEST_METRICS_COLUMNS = (
+    "event_id", "timestamp", "provider", "model", "application", "request_id",
+    "user_id", "prompt_tokens", "completion_tokens", "total_tokens",
+    "latency_ms", "cost", "status", "error"
+)
+
+class _PyformatCursor(sqlite3.Cursor):
     """
-    Create an in-memory SQLite database for testing.
-    This avoids the need for PostgreSQL installation.
+    SQLite cursor that accepts the %s placeholders the services write for
+    psycopg2, so the same SQL runs against the in-memory test database.
     """
-    conn = sqlite3.connect(':memory:')
-    conn.row_factory = sqlite3.Row
     
-    # Create necessary tables
+    def execute(self, sql, parameters=()):
+        return super().execute(sql.replace("%s", "?"), parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return super().executemany(sql.replace("%s", "?"), seq_of_parameters)
+
+class _PyformatConnection(sqlite3.Connection):
+    """SQLite connection whose cursors translate %s placeholders."""
+    
+    def cursor(self, factory=_PyformatCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def _create_test_schema(conn):
+    """Create the tables used by the integration tests."""
     cursor = conn.cursor()
     
     # Create request_metrics table
@@ -55,9 +75,9 @@ def test_db_connection():
         enabled INTEGER,
         alert_type TEXT,
         severity TEXT,
-        thresholds TEXT,  # JSON string
-        filters TEXT,      # JSON string
-        notify_emails TEXT, # JSON string
+        thresholds TEXT,    -- JSON string
+        filters TEXT,       -- JSON string
+        notify_emails TEXT, -- JSON string
         created_at TEXT,
         updated_at TEXT
     )
@@ -66,42 +86,195 @@ def test_db_connection():
     # Create alert_events table
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS alert_events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        config_id INTEGER,
-        triggered_at TEXT,
-        metric TEXT,
-        value REAL,
-        threshold REAL,
-        message TEXT,
-        status TEXT,
+        id TEXT PRIMARY KEY,
+        config_id TEXT,
+        timestamp TEXT,
+        resolved_at TEXT,
+        metric_value REAL,
+        threshold_value REAL,
+        details TEXT,       -- JSON string
         FOREIGN KEY (config_id) REFERENCES alert_configs (id)
     )
     ''')
     
+    # Serve the newest-first event listings, with and without a config
+    # filter, straight from an index; id breaks timestamp ties
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS alert_events_config_ts_idx "
+        "ON alert_events (config_id, timestamp DESC, id DESC)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS alert_events_ts_idx "
+        "ON alert_events (timestamp DESC, id DESC)"
+    )
+    
+    conn.commit()
+    
+    # Catch DDL that SQLite silently truncates or rejects
+    alert_config_columns = conn.execute("PRAGMA table_info(alert_configs)").fetchall()
+    assert len(alert_config_columns) == 11, "alert_configs schema is incomplete"
+
+def _truncate_test_tables(conn):
+    """Delete all rows and reset AUTOINCREMENT counters."""
+    cursor = conn.cursor()
+    for table in _TEST_TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+    cursor.execute("DELETE FROM sqlite_sequence")
     conn.commit()
+
+# SQLite in-memory database for testing
+@pytest.fixture(scope="session")
+def _test_db_session():
+    """
+    Create an in-memory SQLite database once per test session.
+    This avoids the need for PostgreSQL installation.
+    """
+    # Named per xdist worker (or per process outside xdist) so parallel
+    # workers never share a database, while connections opened within this
+    # process can attach to the same one
+    worker = os.environ.get("PYTEST_XDIST_WORKER") or str(os.getpid())
+    conn = sqlite3.connect(
+        f"file:meerkatics_test_{worker}?mode=memory&cache=shared", uri=True,
+        factory=_PyformatConnection
+    )
+    conn.row_factory = sqlite3.Row
+    
+    # Nothing here needs durability or cross-process locking
+    conn.execute("PRAGMA journal_mode=MEMORY")
+    conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    
+    _create_test_schema(conn)
     yield conn
     
-    # Close the connection after the test
+    # Close the connection after the session
     conn.close()
 
+@pytest.fixture
+def test_db_connection(_test_db_session):
+    """
+    Provide the shared test database, emptied again after each test.
+    The schema is only created once per session.
+    
+    Each test runs inside a savepoint that is rolled back afterwards. Code
+    that commits ends the savepoint, so those tests fall back to truncating.
+    """
+    conn = _test_db_session
+    conn.execute("SAVEPOINT test_case")
+    yield conn
+    
+    try:
+        conn.execute("ROLLBACK TO SAVEPOINT test_case")
+        conn.execute("RELEASE SAVEPOINT test_case")
+    except sqlite3.OperationalError:
+        # Committed during the test; the savepoint no longer exists
+        _truncate_test_tables(conn)
+
+@pytest.fixture
+def db_cursor(test_db_connection):
+    """A cursor on the test database, closed after the test."""
+    cursor = test_db_connection.cursor()
+    yield cursor
+    cursor.close()
+
 @pytest.fixture
 def test_db_cleanup(test_db_connection):
     """Clean up test data after each test."""
     yield
-    cursor = test_db_connection.cursor()
-    cursor.execute("DELETE FROM request_metrics")
-    cursor.execute("DELETE FROM alert_events")
-    cursor.execute("DELETE FROM alert_configs")
-    test_db_connection.commit()
+    _truncate_test_tables(test_db_connection)
 
 @pytest.fixture
+def insert_request_metrics(test_db_connection):
+    """
+    Return a loader that inserts request_metrics rows with one executemany.
+    Rows are tuples in _REQUEST_METRICS_COLUMNS order or dicts keyed by
+    column name; missing dict keys are stored as NULL.
+    """
+    query = (
+        f"INSERT INTO request_metrics ({', '.join(_REQUEST_METRICS_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(_REQUEST_METRICS_COLUMNS))})"
+    )
+    
+    def _insert(rows):
+        test_db_connection.executemany(query, (
+            tuple(row.get(column) for column in _REQUEST_METRICS_COLUMNS)
+            if isinstance(row, dict) else row
+            for row in rows
+        ))
+        test_db_connection.commit()
+    
+    return _insert
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    Create a TestClient for the enhanced API app.
+    The app is imported and wired once per session, and the client is held
+    open so every request reuses one event loop instead of starting its own.
+    """
+    from fastapi.testclient import TestClient
+    from sentinelops.backend.api_server.app_enhanced import app
+    
+    # Build the OpenAPI schema up front so the first test doesn't pay for it
+    app.openapi()
+    
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture(scope="session")
+def sample_alert_config():
+    """
+    Provide a cost alert configuration shared by the session.
+    Tests must copy it (e.g. with .dict()) before changing anything.
+    """
+    return AlertConfig(
+        name="Test Cost Alert",
+        description="Alert when total cost exceeds the threshold",
+        enabled=True,
+        alert_type=AlertType.COST,
+        severity=AlertSeverity.HIGH,
+        thresholds=[
+            AlertThreshold(
+                metric="total_cost",
+                operator=">",
+                value=100.0,
+                duration_minutes=5
+            )
+        ],
+        filters={"provider": "openai"},
+        notify_emails=["test@example.com"]
+    )
+
+@pytest.fixture(scope="session")
+def sample_alert_config_data(sample_alert_config):
+    """
+    The sample alert configuration as a request payload, built once per session.
+    Tests must copy it (e.g. {**sample_alert_config_data, "id": ...}) before changing anything.
+    """
+    return sample_alert_config.dict()
+
+@pytest.fixture(scope="session")
 def api_client():
-    """Create a FastAPI TestClient for making API requests."""
+    """
+    Create a FastAPI TestClient for making API requests.
+    The app is imported and wired once per session, and the client is held
+    open so every request reuses one event loop instead of starting its own.
+    """
     from fastapi.testclient import TestClient
     from sentinelops.backend.api_server.main import app
     
-    client = TestClient(app)
-    return client
+    # Build the OpenAPI schema up front so the first test doesn't pay for it
+    app.openapi()
+    
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def api_client_isolated(api_client):
+    """The shared TestClient, with dependency overrides cleared after the test."""
+    yield api_client
+    api_client.app.dependency_overrides.clear()
 
 @pytest.fixture
 def api_auth_headers():
@@ -115,34 +288,92 @@ def alert_service(test_db_connection):
     return service
 
 @pytest.fixture
-def mock_smtp_server():
-    """Mock an SMTP server for testing email alerts."""
+def fake_channels(alert_service):
+    """
+    Enable every channel on alert_service and replace its backends with
+    recorders. Returns the list of (channel, alert_data) pairs dispatched.
+    """
+    sink = []
+    
+    def _recorder(channel):
+        def _send(alert_data):
+            sink.append((channel, alert_data))
+            return True
+        return _send
+    
+    for channel in alert_service.channels:
+        alert_service.config.setdefault(channel, {})["enabled"] = True
+    alert_service.channels = {channel: _recorder(channel) for channel in alert_service.channels}
+    
+    return sink
+
+# The notification client patches and the client instances they return are
+# created once per session, on first use, and stay active from then on. Each
+# test resets the recorded calls and any side effects a previous test set;
+# the return values configured here are kept.
+@pytest.fixture(scope="session")
+def _smtp_class():
     with patch('smtplib.SMTP') as mock_smtp:
-        mock_server = MagicMock()
-        mock_smtp.return_value = mock_server
-        yield mock_server
+        mock_smtp.return_value = MagicMock()
+        yield mock_smtp
+
+@pytest.fixture(scope="session")
+def _slack_client_class():
+    with patch('slack_sdk.WebClient') as mock_client:
+        mock_client.return_value.chat_postMessage.return_value = {"ok": True}
+        yield mock_client
+
+@pytest.fixture(scope="session")
+def _twilio_client_class():
+    with patch('twilio.rest.Client') as mock_client:
+        mock_client.return_value.messages.create.return_value = MagicMock(sid="SM123")
+        yield mock_client
+
+@pytest.fixture(scope="session")
+def _requests_post():
+    with patch('requests.post') as mock_post:
+        mock_post.return_value = MagicMock(status_code=200)
+        yield mock_post
+
+@pytest.fixture(scope="session")
+def _requests_request():
+    with patch('requests.request') as mock_request:
+        mock_request.return_value = MagicMock(status_code=200)
+        mock_request.return_value.json.return_value = {}
+        yield mock_request
+
+@pytest.fixture
+def mock_smtp_server(_smtp_class):
+    """Mock an SMTP server for testing email alerts."""
+    _smtp_class.reset_mock(side_effect=True)
+    # reset_mock() doesn't pass side_effect on to the return value
+    _smtp_class.return_value.reset_mock(side_effect=True)
+    yield _smtp_class.return_value
 
 @pytest.fixture
-def mock_slack_client():
+def mock_slack_client(_slack_client_class):
     """Mock the Slack client for testing Slack alerts."""
-    with patch('slack_sdk.WebClient') as mock_client:
-        mock_instance = MagicMock()
-        mock_client.return_value = mock_instance
-        mock_instance.chat_postMessage.return_value = {"ok": True}
-        yield mock_instance
+    _slack_client_class.reset_mock(side_effect=True)
+    _slack_client_class.return_value.reset_mock(side_effect=True)
+    yield _slack_client_class.return_value
 
 @pytest.fixture
-def mock_twilio_client():
+def mock_twilio_client(_twilio_client_class):
     """Mock the Twilio client for testing SMS alerts."""
-    with patch('twilio.rest.Client') as mock_client:
-        mock_instance = MagicMock()
-        mock_client.return_value = mock_instance
-        mock_instance.messages.create.return_value = MagicMock(sid="SM123")
-        yield mock_instance
+    _twilio_client_class.reset_mock(side_effect=True)
+    _twilio_client_class.return_value.reset_mock(side_effect=True)
+    yield _twilio_client_class.return_value
 
 @pytest.fixture
-def mock_webhook_server():
+def mock_webhook_server(_requests_post):
     """Mock a webhook server for testing webhook alerts."""
-    with patch('requests.post') as mock_post:
-        mock_post.return_value = MagicMock(status_code=200)
-        yield mock_post
+    _requests_post.reset_mock(side_effect=True)
+    _requests_post.return_value.reset_mock(side_effect=True)
+    yield _requests_post
+
+@pytest.fixture
+def mock_http_request(_requests_request):
+    """Mock requests.request for webhook alerts, answering 200 with an empty JSON body."""
+    _requests_request.reset_mock(side_effect=True)
+    _requests_request.return_value.reset_mock(side_effect=True)
+    yield _requests_request
@@ -7,10 +7,47 @@ from unittest.mock import MagicMock, patch
 from sentinelops.backend.api_server.services.alerts import AlertService
 from sentinelops.backend.api_server.models.alerts import AlertConfig, AlertEvent, AlertThreshold, AlertType, AlertSeverity
 
+# Alert timestamp shared by the module; the tests don't depend on its value
+_NOW = datetime.now().isoformat()
+
+# Channel test payloads; tests add the timestamp with {**payload, "timestamp": _NOW}
+_EMAIL_ALERT = {
+    "title": "Email Test Alert",
+    "message": "This is a test email alert",
+    "severity": "info",
+    "metadata": {"test": True}
+}
+
+_SLACK_ALERT = {
+    "title": "Slack Test Alert",
+    "message": "This is a test Slack alert",
+    "severity": "warning",
+    "metadata": {"test": True}
+}
+
+_WEBHOOK_ALERT = {
+    "title": "Webhook Test Alert",
+    "message": "This is a test webhook alert",
+    "severity": "error",
+    "metadata": {"test": True}
+}
+
+_SMS_ALERT = {
+    "title": "SMS Test Alert",
+    "message": "This is a test SMS alert",
+    "severity": "critical",
+    "metadata": {
+        "test": True,
+        "model": "gpt-4",
+        "provider": "openai"
+    }
+}
+
+@pytest.mark.integration
 class TestAlertService:
     """Integration tests for the AlertService."""
     
-    def test_send_alert_all_channels(self, alert_service, mock_smtp_server, mock_slack_api, mock_twilio_api):
+    def test_send_alert_all_channels(self, alert_service, fake_channels):
         """Test sending an alert through all channels."""
         # Send alert through all channels
         result = alert_service.send_alert(
@@ -20,21 +57,16 @@ class TestAlertService:
             metadata={
                 "test": True,
                 "source": "integration_test",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _NOW
             }
         )
         
         # Verify alert was sent successfully
         assert result is True
         
-        # Verify email was sent
-        mock_smtp_server.sendmail.assert_called_once()
-        
-        # Verify Slack notification was sent
-        mock_slack_api.assert_called_once()
-        
-        # Verify SMS was sent
-        assert mock_twilio_api.messages.create.called
+        # Verify the alert was dispatched once to every channel
+        assert sorted(channel for channel, _ in fake_channels) == ["email", "slack", "sms", "webhook"]
+        assert all(alert["title"] == "Critical System Alert" for _, alert in fake_channels)
         
         # Verify alert was added to history
         assert len(alert_service.alert_history) > 0
@@ -42,7 +74,7 @@ class TestAlertService:
         assert latest_alert["title"] == "Critical System Alert"
         assert latest_alert["severity"] == "critical"
         
-    def test_alert_throttling(self, alert_service):
+    def test_alert_throttling(self, alert_service, fake_channels):
         """Test alert throttling to prevent alert fatigue."""
         # Configure throttling for testing
         alert_service.config["general"]["throttle_period_seconds"] = 60
@@ -71,6 +103,16 @@ class TestAlertService:
         )
         assert third_result is True
         
+        # Once the window has passed, the next alert reports what was suppressed
+        alert_service.config["general"]["throttle_period_seconds"] = 0
+        rollover_result = alert_service.send_alert(
+            title="Throttle Test",
+            message="This alert follows the throttle window",
+            severity="warning"
+        )
+        assert rollover_result is True
+        assert alert_service.alert_history[-1]["metadata"]["suppressed_count"] == 1
+        
         # Send critical alert (should not be throttled regardless)
         critical_result = alert_service.send_alert(
             title="Throttle Test",
@@ -166,23 +208,24 @@ class TestAlertService:
     
     def test_email_alert(self, alert_service, mock_smtp_server):
         """Test sending an alert via email."""
+        alert_service.config["email"].update(
+            enabled=True,
+            smtp_server="smtp.example.com",
+            username="alerts@example.com",
+            password="password",
+            from_address="alerts@example.com",
+            to_addresses=["oncall@example.com"],
+            use_tls=True
+        )
+        
         # Send email alert
-        alert_data = {
-            "title": "Email Test Alert",
-            "message": "This is a test email alert",
-            "severity": "info",
-            "timestamp": datetime.now().isoformat(),
-            "metadata": {"test": True}
-        }
+        alert_data = {**_EMAIL_ALERT, "timestamp": _NOW}
         
         result = alert_service._send_email_alert(alert_data)
         assert result is True
         
-        # Verify SMTP interactions
-        mock_smtp_server.starttls.assert_called_once()
-        mock_smtp_server.login.assert_called_once()
-        mock_smtp_server.sendmail.assert_called_once()
-        mock_smtp_server.quit.assert_called_once()
+        # Verify SMTP interactions, in order
+        assert [c[0] for c in mock_smtp_server.mock_calls] == ["starttls", "login", "sendmail", "quit"]
         
         # Verify email content
         args = mock_smtp_server.sendmail.call_args[0]
@@ -194,13 +237,7 @@ class TestAlertService:
     def test_slack_alert(self, alert_service, mock_slack_api):
         """Test sending an alert via Slack."""
         # Send Slack alert
-        alert_data = {
-            "title": "Slack Test Alert",
-            "message": "This is a test Slack alert",
-            "severity": "warning",
-            "timestamp": datetime.now().isoformat(),
-            "metadata": {"test": True}
-        }
+        alert_data = {**_SLACK_ALERT, "timestamp": _NOW}
         
         result = alert_service._send_slack_alert(alert_data)
         assert result is True
@@ -216,52 +253,56 @@ class TestAlertService:
         assert "Slack Test Alert" in str(payload)
         assert "This is a test Slack alert" in str(payload)
     
-    def test_webhook_alert(self, alert_service):
+    def test_slack_alert_batching(self, alert_service, mock_webhook_server):
+        """Test that Slack alerts raised within the batch window go out as one message."""
+        alert_service.config["slack"].update(
+            enabled=True,
+            webhook_url="https://hooks.slack.com/services/test",
+            batch_window_seconds=60
+        )
+        
+        for i in range(3):
+            alert_data = {**_SLACK_ALERT, "title": f"Batched Alert {i}", "timestamp": _NOW}
+            assert alert_service._send_slack_alert(alert_data) is True
+        
+        # Nothing is sent until the window closes or the service is flushed
+        mock_webhook_server.assert_not_called()
+        assert alert_service.flush() is True
+        
+        mock_webhook_server.assert_called_once()
+        attachments = mock_webhook_server.call_args[1]["json"]["attachments"]
+        assert [a["title"] for a in attachments] == ["Batched Alert 0", "Batched Alert 1", "Batched Alert 2"]
+    
+    def test_webhook_alert(self, alert_service, mock_http_request):
         """Test sending an alert via webhook."""
-        # Mock requests.request
-        with patch("requests.request") as mock_request:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_request.return_value = mock_response
-            
-            # Send webhook alert
-            alert_data = {
-                "title": "Webhook Test Alert",
-                "message": "This is a test webhook alert",
-                "severity": "error",
-                "timestamp": datetime.now().isoformat(),
-                "metadata": {"test": True}
-            }
-            
-            result = alert_service._send_webhook_alert(alert_data)
-            assert result is True
-            
-            # Verify webhook request
-            mock_request.assert_called_once()
-            
-            # Verify payload
-            args = mock_request.call_args
-            assert args[0][0] == alert_service.config["webhook"]["method"]
-            assert args[0][1] == alert_service.config["webhook"]["url"]
-            payload = args[1]["json"]
-            assert payload["title"] == "Webhook Test Alert"
-            assert payload["message"] == "This is a test webhook alert"
-            assert payload["severity"] == "error"
+        alert_service.config["webhook"].update(
+            enabled=True,
+            url="https://example.com/webhook",
+            method="POST"
+        )
+        
+        # Send webhook alert
+        alert_data = {**_WEBHOOK_ALERT, "timestamp": _NOW}
+        
+        result = alert_service._send_webhook_alert(alert_data)
+        assert result is True
+        
+        # Verify webhook request
+        mock_http_request.assert_called_once()
+        
+        # Verify payload
+        args = mock_http_request.call_args
+        assert args[0][0] == alert_service.config["webhook"]["method"]
+        assert args[0][1] == alert_service.config["webhook"]["url"]
+        payload = args[1]["json"]
+        assert payload["title"] == "Webhook Test Alert"
+        assert payload["message"] == "This is a test webhook alert"
+        assert payload["severity"] == "error"
     
     def test_sms_alert(self, alert_service, mock_twilio_api):
         """Test sending an alert via SMS."""
         # Send SMS alert
-        alert_data = {
-            "title": "SMS Test Alert",
-            "message": "This is a test SMS alert",
-            "severity": "critical",
-            "timestamp": datetime.now().isoformat(),
-            "metadata": {
-                "test": True,
-                "model": "gpt-4",
-                "provider": "openai"
-            }
-        }
+        alert_data = {**_SMS_ALERT, "timestamp": _NOW}
         
         result = alert_service._send_sms_alert(alert_data)
         assert result is True
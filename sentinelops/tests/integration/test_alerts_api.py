@@ -5,6 +5,7 @@ from datetime import datetime
 from fastapi import status
 
 # Test alert API endpoints
+@pytest.mark.integration
 class TestAlertsAPI:
     """Integration tests for the alerts API endpoints."""
     
@@ -118,10 +119,10 @@ class TestAlertsAPI:
         assert "smtp_server" in config["email"]
         assert "password" not in config["email"]  # Sensitive data should be excluded
         
-    def test_alert_configs_crud(self, client, sample_alert_config):
+    def test_alert_configs_crud(self, client, sample_alert_config, sample_alert_config_data):
         """Test CRUD operations for alert configurations."""
         # Create a new alert config
-        config_data = sample_alert_config.dict()
+        config_data = sample_alert_config_data
         response = client.post(
             "/api/alerts/configs",
             json=config_data,
@@ -181,10 +182,10 @@ class TestAlertsAPI:
         )
         assert response.status_code == status.HTTP_404_NOT_FOUND
         
-    def test_get_all_alert_configs(self, client, sample_alert_config):
+    def test_get_all_alert_configs(self, client, sample_alert_config_data):
         """Test retrieving all alert configurations."""
         # Create a test config first
-        config_data = sample_alert_config.dict()
+        config_data = sample_alert_config_data
         client.post(
             "/api/alerts/configs",
             json=config_data,
@@ -211,13 +212,12 @@ class TestAlertsAPI:
         enabled_configs = response.json()
         assert all(config["enabled"] for config in enabled_configs)
         
-    def test_alert_events(self, client, test_db_connection, sample_alert_config):
+    def test_alert_events(self, client, test_db_connection, sample_alert_config_data):
         """Test alert events endpoints."""
         # Create a test config
         cursor = test_db_connection.cursor()
         config_id = str(uuid.uuid4())
-        config_data = sample_alert_config.dict()
-        config_data["id"] = config_id
+        config_data = {**sample_alert_config_data, "id": config_id}
         
         cursor.execute(
             "INSERT INTO alert_configs (id, config, enabled) VALUES (%s, %s, %s)",
@@ -278,3 +278,59 @@ class TestAlertsAPI:
         resolved_event = response.json()
         assert resolved_event["id"] == event_id
         assert resolved_event["resolved_at"] is not None
+    
+    def test_alert_events_cursor_pages_across_timestamp_tie(self, client, test_db_connection, sample_alert_config_data):
+        """Test that cursor paging through a config's events crosses a timestamp tie without gaps or repeats."""
+        cursor = test_db_connection.cursor()
+        config_id = str(uuid.uuid4())
+        config_data = {**sample_alert_config_data, "id": config_id}
+        
+        cursor.execute(
+            "INSERT INTO alert_configs (id, config, enabled) VALUES (%s, %s, %s)",
+            (config_id, json.dumps(config_data), True)
+        )
+        
+        # Three events share the newest timestamp; the page boundary falls inside them
+        tied = datetime(2024, 1, 1, 12, 0, 0)
+        older = datetime(2024, 1, 1, 11, 0, 0)
+        cursor.executemany(
+            """
+            INSERT INTO alert_events 
+            (id, config_id, timestamp, metric_value, threshold_value, details) 
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            [
+                ("event-0", config_id, older, 110.0, 100.0, json.dumps({})),
+                ("event-1", config_id, tied, 120.0, 100.0, json.dumps({})),
+                ("event-2", config_id, tied, 130.0, 100.0, json.dumps({})),
+                ("event-3", config_id, tied, 140.0, 100.0, json.dumps({})),
+            ]
+        )
+        test_db_connection.commit()
+        
+        # Follow the cursor until a page comes back short
+        pages = []
+        params = {"config_id": config_id, "limit": 2}
+        while True:
+            response = client.get(
+                "/api/alerts/events",
+                params=params,
+                headers={"X-API-Key": "test-api-key"}
+            )
+            assert response.status_code == status.HTTP_200_OK
+            page = response.json()
+            pages.append([event["id"] for event in page])
+            if len(page) < params["limit"]:
+                break
+            params["cursor"] = page[-1]["timestamp"] + "_" + page[-1]["id"]
+        
+        # Newest first, ties broken by id descending
+        assert pages == [["event-3", "event-2"], ["event-1", "event-0"], []]
+        
+        # A malformed cursor is a client error
+        response = client.get(
+            "/api/alerts/events",
+            params={"cursor": "not-a-cursor"},
+            headers={"X-API-Key": "test-api-key"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
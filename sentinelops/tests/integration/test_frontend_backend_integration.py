@@ -1,17 +1,14 @@
 import pytest
 import json
-import os
-import sys
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from datetime import datetime
 
-# Add the project root to the path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-
 # Import the application
 from sentinelops.backend.api_server.app_enhanced import app
+from sentinelops.backend.api_server.routers.alerts import alert_service as router_alert_service
 
+@pytest.mark.integration
 class TestFrontendBackendIntegration:
     """
     Integration tests for frontend-backend interaction.
@@ -19,35 +16,27 @@ class TestFrontendBackendIntegration:
     """
     
     @pytest.fixture
-    def mock_frontend_fetch(self):
+    def mock_frontend_fetch(self, mock_http_request):
         """Mock the frontend fetch API calls."""
-        with patch("requests.request") as mock_request:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {}
-            mock_request.return_value = mock_response
-            yield mock_request
+        yield mock_http_request
     
-    def test_alerts_panel_data_loading(self, client):
+    def test_alerts_panel_data_loading(self, client, monkeypatch):
         """
         Test that the AlertsPanel component can load alert data from the API.
         This simulates the frontend component fetching alert history.
         """
-        # Create some test alerts first
+        # Seed the history the API serves directly, in the form send_alert
+        # records; only the GET path is under test here
         alert_data = {
             "title": "Frontend Test Alert",
             "message": "This is a test alert for frontend integration",
             "severity": "warning",
+            "timestamp": datetime.now().isoformat(),
             "metadata": {"source": "frontend_test"}
         }
-        
-        # Send alerts to have data in history
-        for i in range(3):
-            client.post(
-                "/api/alerts/",
-                json=alert_data,
-                headers={"X-API-Key": "test-api-key"}
-            )
+        seeded_history = router_alert_service.alert_history.copy()
+        seeded_history.extend(dict(alert_data) for _ in range(3))
+        monkeypatch.setattr(router_alert_service, "alert_history", seeded_history)
         
         # Simulate the frontend component fetching alert history
         response = client.get(
@@ -69,13 +58,13 @@ class TestFrontendBackendIntegration:
             assert "timestamp" in alert
             assert "metadata" in alert
     
-    def test_alert_config_management(self, client, sample_alert_config):
+    def test_alert_config_management(self, client, sample_alert_config_data):
         """
         Test that alert configurations can be managed through the API.
         This simulates the frontend component for managing alert configurations.
         """
         # Simulate creating a new alert config from the frontend
-        config_data = sample_alert_config.dict()
+        config_data = sample_alert_config_data
         create_response = client.post(
             "/api/alerts/configs",
             json=config_data,
@@ -208,7 +197,7 @@ class TestFrontendBackendIntegration:
         # Should succeed
         assert response.status_code in [200, 201]
     
-    def test_alert_events_pagination(self, client, test_db_connection, sample_alert_config):
+    def test_alert_events_pagination(self, client, test_db_connection, sample_alert_config, sample_alert_config_data):
         """
         Test pagination for alert events.
         This simulates the frontend component for browsing alert events with pagination.
@@ -216,30 +205,36 @@ class TestFrontendBackendIntegration:
         # Create a test config
         cursor = test_db_connection.cursor()
         config_id = str(sample_alert_config.id or "test-config-id")
-        config_data = sample_alert_config.dict()
-        config_data["id"] = config_id
+        config_data = {**sample_alert_config_data, "id": config_id}
         
         cursor.execute(
             "INSERT INTO alert_configs (id, config, enabled) VALUES (%s, %s, %s)",
             (config_id, json.dumps(config_data), True)
         )
         
-        # Create multiple test events
-        for i in range(25):  # Create enough events to test pagination
-            event_id = f"test-event-{i}"
-            timestamp = datetime.now()
-            metric_value = 100.0 + i
-            threshold_value = 100.0
-            details = {"index": i, "source": "pagination_test"}
-            
-            cursor.execute(
-                """
-                INSERT INTO alert_events 
-                (id, config_id, timestamp, metric_value, threshold_value, details) 
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (event_id, config_id, timestamp, metric_value, threshold_value, json.dumps(details))
+        # Create enough events to test pagination, inserted as one batch
+        timestamp = datetime.now()
+        threshold_value = 100.0
+        events = [
+            (
+                f"test-event-{i}",
+                config_id,
+                timestamp,
+                100.0 + i,
+                threshold_value,
+                json.dumps({"index": i, "source": "pagination_test"})
             )
+            for i in range(25)
+        ]
+        
+        cursor.executemany(
+            """
+            INSERT INTO alert_events 
+            (id, config_id, timestamp, metric_value, threshold_value, details) 
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            events
+        )
         
         test_db_connection.commit()
         
@@ -265,9 +260,11 @@ class TestFrontendBackendIntegration:
         assert isinstance(page1_events, list)
         assert len(page1_events) == 10
         
-        # Test second page
+        # Test second page, continuing from the last event of the first
+        cursor = page1_events[-1]["timestamp"] + "_" + page1_events[-1]["id"]
         response = client.get(
-            "/api/alerts/events?limit=10&offset=10",
+            "/api/alerts/events",
+            params={"limit": 10, "cursor": cursor},
             headers={"X-API-Key": "test-api-key"}
         )
         
@@ -1,19 +1,110 @@
 import pytest
 import json
-import os
-import sys
 import uuid
-from datetime import datetime, timedelta
-from unittest.mock import patch, MagicMock
-
-# Add the project root to the path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+from datetime import datetime
 
 # Import the necessary modules
 from sentinelops.backend.stream_processor.processors.metrics_processor import MetricsProcessor
 from sentinelops.backend.api_server.services.alerts import AlertService
 from sentinelops.backend.api_server.models.alerts import AlertConfig, AlertThreshold, AlertType, AlertSeverity
 
+def _alert_config(name, description, alert_type, severity, metric, value):
+    """Build an alert config on gpt-4 traffic with a single 5 minute threshold."""
+    return AlertConfig(
+        name=name,
+        description=description,
+        enabled=True,
+        alert_type=alert_type,
+        severity=severity,
+        thresholds=[
+            AlertThreshold(
+                metric=metric,
+                operator=">",
+                value=value,
+                duration_minutes=5
+            )
+        ],
+        filters={"provider": "openai", "model": "gpt-4"},
+        notify_emails=["admin@example.com"]
+    )
+
+def _cost_alert_config():
+    # Low threshold for testing
+    return _alert_config("Test Cost Alert", "Alert when cost exceeds threshold",
+                         AlertType.COST, AlertSeverity.MEDIUM, "total_cost", 10.0)
+
+def _latency_alert_config():
+    # 2000ms threshold for testing
+    return _alert_config("Test Latency Alert", "Alert when latency exceeds threshold",
+                         AlertType.PERFORMANCE, AlertSeverity.HIGH, "avg_latency", 2000.0)
+
+def _error_rate_alert_config():
+    # 20% error rate threshold
+    return _alert_config("Test Error Rate Alert", "Alert when error rate exceeds threshold",
+                         AlertType.ERROR_RATE, AlertSeverity.HIGH, "error_rate", 20.0)
+
+# Every event built by these tests is stamped after this, so filtering on
+# it picks up this run's rows however long the session takes
+_TEST_SESSION_START = datetime.now().isoformat()
+
+# Event and request IDs drawn from a fixed pool; event i uses _UUID_POOL[i]
+# and request _UUID_POOL[i + 32]. Rows are rolled back between tests, so
+# reusing IDs across tests is safe.
+_UUID_POOL = [str(uuid.uuid4()) for _ in range(64)]
+
+_BASE_GPT4_EVENT = {
+    "provider": "openai",
+    "model": "gpt-4",
+    "application": "chatbot",
+    "user_id": "test-user",
+}
+
+_BASE_GPT35_EVENT = {
+    "provider": "openai",
+    "model": "gpt-3.5-turbo",
+    "application": "summarizer",
+    "user_id": "test-user",
+}
+
+def _events(base, count, start=0, timestamp=None, **fields):
+    """
+    Build count events from a base event and the given token, latency, cost
+    and status fields. The batch shares one timestamp, taken now by default.
+    """
+    timestamp = timestamp or datetime.now().isoformat()
+    return [
+        {
+            **base,
+            "event_id": _UUID_POOL[i],
+            "request_id": f"req-{_UUID_POOL[i + 32]}",
+            "timestamp": timestamp,
+            **fields
+        }
+        for i in range(start, start + count)
+    ]
+
+def _high_cost_events():
+    # High cost to trigger the cost alert
+    return _events(_BASE_GPT4_EVENT, 5, prompt_tokens=1000, completion_tokens=500, total_tokens=1500,
+                   latency_ms=1200, cost=3.0, status="success")
+
+def _high_latency_events():
+    # High latency to trigger the latency alert
+    return _events(_BASE_GPT4_EVENT, 5, prompt_tokens=100, completion_tokens=50, total_tokens=150,
+                   latency_ms=3000, cost=0.0075, status="success")
+
+def _high_error_rate_events():
+    # 8 successful events and 2 errors (20% error rate)
+    timestamp = datetime.now().isoformat()
+    return _events(
+        _BASE_GPT4_EVENT, 8, timestamp=timestamp, prompt_tokens=100, completion_tokens=50,
+        total_tokens=150, latency_ms=1000, cost=0.0075, status="success"
+    ) + _events(
+        _BASE_GPT4_EVENT, 2, start=8, timestamp=timestamp, prompt_tokens=100, completion_tokens=0,
+        total_tokens=100, latency_ms=500, cost=0.0025, status="error", error="rate_limit_exceeded"
+    )
+
+@pytest.mark.integration
 class TestStreamProcessorIntegration:
     """
     Integration tests for the stream processor.
@@ -28,102 +119,51 @@ class TestStreamProcessorIntegration:
         return processor
     
     @pytest.fixture
-    def cost_alert_config(self, alert_service):
-        """Create a cost alert configuration for testing."""
-        config = AlertConfig(
-            name="Test Cost Alert",
-            description="Alert when cost exceeds threshold",
-            enabled=True,
-            alert_type=AlertType.COST,
-            severity=AlertSeverity.MEDIUM,
-            thresholds=[
-                AlertThreshold(
-                    metric="total_cost",
-                    operator=">",
-                    value=10.0,  # Low threshold for testing
-                    duration_minutes=5
-                )
-            ],
-            filters={"provider": "openai", "model": "gpt-4"},
-            notify_emails=["admin@example.com"]
-        )
+    def sent_alerts(self, alert_service, metrics_processor):
+        """
+        Replace alert_service.send_alert with a recorder and inject the service
+        into the metrics processor. Returns the (args, kwargs) of each call.
+        """
+        calls = []
         
-        config_id = alert_service.create_alert_config(config)
-        config.id = config_id
-        return config
+        def _send_alert(*args, **kwargs):
+            calls.append((args, kwargs))
+            return True
+        
+        # alert_service is built per test, so the swap needs no undoing
+        alert_service.send_alert = _send_alert
+        metrics_processor.alert_service = alert_service
+        return calls
     
     @pytest.fixture
-    def latency_alert_config(self, alert_service):
-        """Create a latency alert configuration for testing."""
-        config = AlertConfig(
-            name="Test Latency Alert",
-            description="Alert when latency exceeds threshold",
-            enabled=True,
-            alert_type=AlertType.PERFORMANCE,
-            severity=AlertSeverity.HIGH,
-            thresholds=[
-                AlertThreshold(
-                    metric="avg_latency",
-                    operator=">",
-                    value=2000.0,  # 2000ms threshold for testing
-                    duration_minutes=5
-                )
-            ],
-            filters={"provider": "openai", "model": "gpt-4"},
-            notify_emails=["admin@example.com"]
-        )
-        
-        config_id = alert_service.create_alert_config(config)
-        config.id = config_id
+    def cost_alert_config(self, alert_service):
+        """Create a cost alert configuration for testing."""
+        config = _cost_alert_config()
+        config.id = alert_service.create_alert_config(config)
         return config
     
-    def test_process_events_to_database(self, metrics_processor, test_db_connection):
+    def test_process_events_to_database(self, metrics_processor, db_cursor):
         """Test that events are correctly processed and stored in the database."""
         # Create sample events
-        events = [
-            {
-                "event_id": str(uuid.uuid4()),
-                "timestamp": datetime.now().isoformat(),
-                "provider": "openai",
-                "model": "gpt-4",
-                "application": "chatbot",
-                "request_id": f"req-{uuid.uuid4()}",
-                "user_id": "test-user",
-                "prompt_tokens": 100,
-                "completion_tokens": 50,
-                "total_tokens": 150,
-                "latency_ms": 1200,
-                "cost": 0.0075,
-                "status": "success"
-            },
-            {
-                "event_id": str(uuid.uuid4()),
-                "timestamp": datetime.now().isoformat(),
-                "provider": "openai",
-                "model": "gpt-3.5-turbo",
-                "application": "summarizer",
-                "request_id": f"req-{uuid.uuid4()}",
-                "user_id": "test-user",
-                "prompt_tokens": 200,
-                "completion_tokens": 100,
-                "total_tokens": 300,
-                "latency_ms": 800,
-                "cost": 0.0045,
-                "status": "success"
-            }
-        ]
+        timestamp = datetime.now().isoformat()
+        events = _events(
+            _BASE_GPT4_EVENT, 1, timestamp=timestamp, prompt_tokens=100, completion_tokens=50,
+            total_tokens=150, latency_ms=1200, cost=0.0075, status="success"
+        ) + _events(
+            _BASE_GPT35_EVENT, 1, start=1, timestamp=timestamp, prompt_tokens=200, completion_tokens=100,
+            total_tokens=300, latency_ms=800, cost=0.0045, status="success"
+        )
         
         # Process events
         metrics_processor.process_events(events)
         
         # Verify events were stored in the database
-        cursor = test_db_connection.cursor()
-        cursor.execute("SELECT COUNT(*) FROM request_metrics")
-        count = cursor.fetchone()[0]
+        db_cursor.execute("SELECT COUNT(*) FROM request_metrics")
+        count = db_cursor.fetchone()[0]
         assert count >= 2
         
         # Verify metrics were aggregated
-        cursor.execute(
+        db_cursor.execute(
             """
             SELECT provider, model, COUNT(*) 
             FROM request_metrics 
@@ -131,272 +171,83 @@ class TestStreamProcessorIntegration:
             GROUP BY provider, model
             """
         )
-        results = cursor.fetchall()
+        results = db_cursor.fetchall()
         assert len(results) >= 2
         
         # Verify we can retrieve the events by model
-        cursor.execute(
+        db_cursor.execute(
             """
             SELECT * FROM request_metrics 
             WHERE provider = 'openai' AND model = 'gpt-4'
             """
         )
-        gpt4_events = cursor.fetchall()
+        gpt4_events = db_cursor.fetchall()
         assert len(gpt4_events) >= 1
     
-    def test_alert_triggering_on_cost(self, metrics_processor, test_db_connection, 
-                                     cost_alert_config, alert_service, mock_smtp_server):
-        """Test that cost alerts are triggered when thresholds are exceeded."""
-        # Create high-cost events that should trigger the alert
-        high_cost_events = []
-        for i in range(5):
-            high_cost_events.append({
-                "event_id": str(uuid.uuid4()),
-                "timestamp": datetime.now().isoformat(),
-                "provider": "openai",
-                "model": "gpt-4",
-                "application": "chatbot",
-                "request_id": f"req-{uuid.uuid4()}",
-                "user_id": "test-user",
-                "prompt_tokens": 1000,
-                "completion_tokens": 500,
-                "total_tokens": 1500,
-                "latency_ms": 1200,
-                "cost": 3.0,  # High cost to trigger alert
-                "status": "success"
-            })
+    @pytest.mark.parametrize("make_config, make_events", [
+        pytest.param(_cost_alert_config, _high_cost_events, id="cost"),
+        pytest.param(_latency_alert_config, _high_latency_events, id="latency"),
+        pytest.param(_error_rate_alert_config, _high_error_rate_events, id="error_rate"),
+    ])
+    def test_alert_triggered_above_threshold(self, metrics_processor, db_cursor, alert_service,
+                                             sent_alerts, make_config, make_events):
+        """Test that cost, latency and error rate alerts are triggered when thresholds are exceeded."""
+        config = make_config()
+        config.id = alert_service.create_alert_config(config)
         
-        # Process events
-        with patch.object(alert_service, 'send_alert') as mock_send_alert:
-            # Set up the mock to return True
-            mock_send_alert.return_value = True
-            
-            # Inject the alert service into the metrics processor
-            metrics_processor.alert_service = alert_service
-            
-            # Process the events
-            metrics_processor.process_events(high_cost_events)
-            
-            # Check if alert was triggered
-            cursor = test_db_connection.cursor()
-            cursor.execute(
-                """
-                SELECT SUM(cost) FROM request_metrics 
-                WHERE provider = 'openai' AND model = 'gpt-4'
-                """
-            )
-            total_cost = cursor.fetchone()[0]
-            
-            # Verify total cost exceeds threshold
-            assert total_cost > cost_alert_config.thresholds[0].value
-            
-            # Verify alert was triggered
-            mock_send_alert.assert_called()
-            
-            # Verify alert event was created
-            cursor.execute(
-                """
-                SELECT COUNT(*) FROM alert_events 
-                WHERE config_id = %s
-                """,
-                (cost_alert_config.id,)
-            )
-            alert_count = cursor.fetchone()[0]
-            assert alert_count >= 1
-    
-    def test_alert_triggering_on_latency(self, metrics_processor, test_db_connection,
-                                        latency_alert_config, alert_service, mock_smtp_server):
-        """Test that latency alerts are triggered when thresholds are exceeded."""
-        # Create high-latency events that should trigger the alert
-        high_latency_events = []
-        for i in range(5):
-            high_latency_events.append({
-                "event_id": str(uuid.uuid4()),
-                "timestamp": datetime.now().isoformat(),
-                "provider": "openai",
-                "model": "gpt-4",
-                "application": "chatbot",
-                "request_id": f"req-{uuid.uuid4()}",
-                "user_id": "test-user",
-                "prompt_tokens": 100,
-                "completion_tokens": 50,
-                "total_tokens": 150,
-                "latency_ms": 3000,  # High latency to trigger alert
-                "cost": 0.0075,
-                "status": "success"
-            })
+        # Process the events
+        metrics_processor.process_events(make_events())
         
-        # Process events
-        with patch.object(alert_service, 'send_alert') as mock_send_alert:
-            # Set up the mock to return True
-            mock_send_alert.return_value = True
-            
-            # Inject the alert service into the metrics processor
-            metrics_processor.alert_service = alert_service
-            
-            # Process the events
-            metrics_processor.process_events(high_latency_events)
-            
-            # Check if alert was triggered
-            cursor = test_db_connection.cursor()
-            cursor.execute(
-                """
-                SELECT AVG(latency_ms) FROM request_metrics 
-                WHERE provider = 'openai' AND model = 'gpt-4'
-                """
-            )
-            avg_latency = cursor.fetchone()[0]
-            
-            # Verify average latency exceeds threshold
-            assert avg_latency > latency_alert_config.thresholds[0].value
-            
-            # Verify alert was triggered
-            mock_send_alert.assert_called()
-            
-            # Verify alert event was created
-            cursor.execute(
-                """
-                SELECT COUNT(*) FROM alert_events 
-                WHERE config_id = %s
-                """,
-                (latency_alert_config.id,)
-            )
-            alert_count = cursor.fetchone()[0]
-            assert alert_count >= 1
+        # Verify alert was triggered
+        assert sent_alerts
+        
+        # Read the gpt-4 aggregates and the alert event count in one query
+        db_cursor.execute(
+            """
+            SELECT SUM(cost), AVG(latency_ms),
+                   (SELECT COUNT(*) FROM alert_events WHERE config_id = %s)
+            FROM request_metrics 
+            WHERE provider = 'openai' AND model = 'gpt-4'
+            """,
+            (config.id,)
+        )
+        total_cost, avg_latency, alert_count = db_cursor.fetchone()
+        
+        # Verify the aggregated metric exceeds the threshold; the error rate
+        # isn't stored as a column, so only the alert event is checked for it
+        threshold = config.thresholds[0]
+        observed = {"total_cost": total_cost, "avg_latency": avg_latency}.get(threshold.metric)
+        if observed is not None:
+            assert observed > threshold.value
+        
+        # Verify alert event was created
+        assert alert_count >= 1
     
-    def test_alert_not_triggered_below_threshold(self, metrics_processor, test_db_connection,
-                                               cost_alert_config, alert_service):
+    def test_alert_not_triggered_below_threshold(self, metrics_processor, db_cursor,
+                                               cost_alert_config, sent_alerts):
         """Test that alerts are not triggered when metrics are below thresholds."""
         # Create low-cost events that should not trigger the alert
-        low_cost_events = []
-        for i in range(5):
-            low_cost_events.append({
-                "event_id": str(uuid.uuid4()),
-                "timestamp": datetime.now().isoformat(),
-                "provider": "openai",
-                "model": "gpt-4",
-                "application": "chatbot",
-                "request_id": f"req-{uuid.uuid4()}",
-                "user_id": "test-user",
-                "prompt_tokens": 10,
-                "completion_tokens": 5,
-                "total_tokens": 15,
-                "latency_ms": 500,
-                "cost": 0.0005,  # Low cost, should not trigger alert
-                "status": "success"
-            })
-        
-        # Process events
-        with patch.object(alert_service, 'send_alert') as mock_send_alert:
-            # Inject the alert service into the metrics processor
-            metrics_processor.alert_service = alert_service
-            
-            # Process the events
-            metrics_processor.process_events(low_cost_events)
-            
-            # Check if alert was triggered
-            cursor = test_db_connection.cursor()
-            cursor.execute(
-                """
-                SELECT SUM(cost) FROM request_metrics 
-                WHERE provider = 'openai' AND model = 'gpt-4' AND
-                timestamp > %s
-                """,
-                (datetime.now() - timedelta(minutes=10),)
-            )
-            total_cost = cursor.fetchone()[0]
-            
-            # Verify total cost is below threshold
-            assert total_cost < cost_alert_config.thresholds[0].value
-            
-            # Verify alert was not triggered
-            mock_send_alert.assert_not_called()
-    
-    def test_error_rate_alert(self, metrics_processor, test_db_connection, alert_service):
-        """Test that error rate alerts are triggered correctly."""
-        # Create an error rate alert config
-        error_config = AlertConfig(
-            name="Test Error Rate Alert",
-            description="Alert when error rate exceeds threshold",
-            enabled=True,
-            alert_type=AlertType.ERROR_RATE,
-            severity=AlertSeverity.HIGH,
-            thresholds=[
-                AlertThreshold(
-                    metric="error_rate",
-                    operator=">",
-                    value=20.0,  # 20% error rate threshold
-                    duration_minutes=5
-                )
-            ],
-            filters={"provider": "openai", "model": "gpt-4"},
-            notify_emails=["admin@example.com"]
+        low_cost_events = _events(
+            _BASE_GPT4_EVENT, 5, prompt_tokens=10, completion_tokens=5, total_tokens=15,
+            latency_ms=500, cost=0.0005, status="success"  # Low cost, should not trigger alert
         )
         
-        config_id = alert_service.create_alert_config(error_config)
-        error_config.id = config_id
+        # Process the events
+        metrics_processor.process_events(low_cost_events)
         
-        # Create events with a high error rate
-        events = []
-        # Add 8 successful events
-        for i in range(8):
-            events.append({
-                "event_id": str(uuid.uuid4()),
-                "timestamp": datetime.now().isoformat(),
-                "provider": "openai",
-                "model": "gpt-4",
-                "application": "chatbot",
-                "request_id": f"req-{uuid.uuid4()}",
-                "user_id": "test-user",
-                "prompt_tokens": 100,
-                "completion_tokens": 50,
-                "total_tokens": 150,
-                "latency_ms": 1000,
-                "cost": 0.0075,
-                "status": "success"
-            })
+        # Check if alert was triggered
+        db_cursor.execute(
+            """
+            SELECT SUM(cost) FROM request_metrics 
+            WHERE provider = 'openai' AND model = 'gpt-4' AND
+            timestamp > %s
+            """,
+            (_TEST_SESSION_START,)
+        )
+        total_cost = db_cursor.fetchone()[0]
         
-        # Add 2 error events (20% error rate)
-        for i in range(2):
-            events.append({
-                "event_id": str(uuid.uuid4()),
-                "timestamp": datetime.now().isoformat(),
-                "provider": "openai",
-                "model": "gpt-4",
-                "application": "chatbot",
-                "request_id": f"req-{uuid.uuid4()}",
-                "user_id": "test-user",
-                "prompt_tokens": 100,
-                "completion_tokens": 0,
-                "total_tokens": 100,
-                "latency_ms": 500,
-                "cost": 0.0025,
-                "status": "error",
-                "error": "rate_limit_exceeded"
-            })
+        # Verify total cost is below threshold
+        assert total_cost < cost_alert_config.thresholds[0].value
         
-        # Process events
-        with patch.object(alert_service, 'send_alert') as mock_send_alert:
-            # Set up the mock to return True
-            mock_send_alert.return_value = True
-            
-            # Inject the alert service into the metrics processor
-            metrics_processor.alert_service = alert_service
-            
-            # Process the events
-            metrics_processor.process_events(events)
-            
-            # Verify alert was triggered
-            mock_send_alert.assert_called()
-            
-            # Verify alert event was created
-            cursor = test_db_connection.cursor()
-            cursor.execute(
-                """
-                SELECT COUNT(*) FROM alert_events 
-                WHERE config_id = %s
-                """,
-                (error_config.id,)
-            )
-            alert_count = cursor.fetchone()[0]
-            assert alert_count >= 1
+        # Verify alert was not triggered
+        assert sent_alerts == []
@@ -1,13 +1,8 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import json
-import os
-import sys
 from decimal import Decimal
 
-# Add the parent directory to the path to import the module
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
-
 from sentinelops.sdk.utils.cost import CostCalculator
 
 class TestCostCalculator(unittest.TestCase):